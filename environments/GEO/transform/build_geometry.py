@@ -0,0 +1,48 @@
+# SÃO PAULO - GEOMETRIA PRÉ-PROCESSADA DOS DISTRITOS
+# Converte o GeoJSON dos distritos para o formato binário lido por `environments.geometry.DistrictMap`:
+# vértices em um array plano + offsets dos anéis + nomes dos distritos + índice de pixels por distrito.
+# Substitui a exportação de `get_SP.py` como arquivo .py de tuplas (lento de importar).
+# Uso (na raiz do repositório): python environments/GEO/transform/build_geometry.py
+
+import os
+import sys
+
+import geopandas as gpd
+
+sys.path.append(os.path.abspath("."))
+from environments.geometry import DEFAULT_GEOMETRY_PATH, DistrictMap
+
+# Caminhos
+geojson_path = os.path.join("environments", "GEO", "raw", "distritos.geojson")
+output_path  = DEFAULT_GEOMETRY_PATH
+
+# Parâmetros (os mesmos de get_SP.py)
+scale  = 0.00005        # quanto menor, mais cabe na tela
+offset = (400, 550)     # move o mapa no plano (x, y)
+width, height = 800, 600
+
+# Carrega o GeoJSON e reprojeta para metros
+gdf = gpd.read_file(geojson_path)
+gdf = gdf.to_crs(epsg=3857)
+
+
+def exterior_rings(geometry):
+    if geometry.geom_type == "Polygon":
+        return [geometry.exterior.coords]
+    elif geometry.geom_type == "MultiPolygon":
+        return [poly.exterior.coords for poly in geometry.geoms]
+    return []
+
+
+rings, ring_names = [], []
+for nome, geom in zip(gdf["ds_nome"], gdf.geometry):
+    for coords in exterior_rings(geom):
+        rings.append([(x * scale + offset[0], -y * scale + offset[1]) for x, y in coords])
+        ring_names.append(nome)
+
+district_map = DistrictMap.from_rings(rings, ring_names, width, height)
+os.makedirs(os.path.dirname(output_path), exist_ok=True)
+district_map.save(output_path)
+
+print(f"✅ Geometria salva em '{output_path}' com {len(rings)} anéis e {len(district_map.names)} distritos.")
+print(f"📦 {district_map.coords.shape[0]} vértices, {len(district_map.pixels)} pixels indexados.")
@@ -1,12 +1,17 @@
-
+from collections import deque
 
 import gymnasium as gym
-import numpy as np
 from gymnasium import spaces
-import pandas as pd
-import matplotlib.pyplot as plt
-import time
-import pygame
+
+from .backends import RENDER_BACKENDS, load_backend
+from .bairro_index import BairroIndex
+from .events import MarketEventEngine
+from .market import IDH_BAIRROS, LazyMarket, Market
+from .observation import make_observation
+from . import core as _core
+from . import perf as _perf
+from .portfolio import Holdings, Portfolio
+from .seeding import market_rng
 
 ###################################################################################################################
 class HomeChoiceEnv(gym.Env):
@@ -15,332 +20,404 @@ class HomeChoiceEnv(gym.Env):
     O agente deve comprar e vender imóveis para atingir R$ 1.000.000.
     O mercado é dinâmico, com valorização e desvalorização dos imóveis baseada em características reais.
     """
-    def __init__(self, render_mode='human'):
+    metadata = {"render_modes": ["human", "rgb_array", "ansi"], "render_fps": 60}
+
+    def __init__(self, render_mode='human', market_cache=None, noisy_valuation=False, observation=None, market_size=100000,
+                 lazy_market=False, chunk_size=10000, recorder=None,
+                 dashboard_interval=1.0, action_mode="discrete", action_window=8, sell_ranks=8, sell_by="rank",
+                 stale_after=30, stale_decay=0.0, profile=False, copy_obs=True):
         super().__init__()
+        if render_mode is not None and render_mode not in self.metadata["render_modes"]:
+            raise ValueError(f"render_mode desconhecido: {render_mode!r} (use {self.metadata['render_modes']} ou None)")
         self.render_mode        = render_mode
-        self.history            = []  # Histórico para renderização gráfica
-        self.fig, self.ax       = None, None
+        self.market_size        = market_size  # Número de imóveis do mercado (100.000 por padrão)
+        self.market_cache       = market_cache  # MarketCache opcional: reutiliza mercados já gerados para a mesma semente
+        self.lazy_market        = lazy_market  # Materializa o mercado em blocos de `chunk_size` conforme o episódio avança
+        self.chunk_size         = chunk_size
+        self.recorder           = recorder  # TrajectoryRecorder opcional: grava cada passo em disco (usado também pelos gráficos)
+        self._temp_recorder     = False  # True se `recorder` é um gravador temporário criado pelo próprio ambiente
+        self.fig, self.axs      = None, None  # Figura do MetricsDashboard, criada no primeiro `render_grafs`
+        self.dashboard_interval = dashboard_interval  # Segundos entre redesenhos dos gráficos
         self.initial_cash       = 100000 # Saldo inicial do agente
         self.cash               = 100000 
-        self.owned_properties   = []  # Lista de imóveis comprados
+        self.action_mode        = action_mode
+        # Imóveis comprados (índices no mercado) e seu valor de mercado
+        self.portfolio          = Holdings() if action_mode == "multi" else Portfolio()
+        self.noisy_valuation    = noisy_valuation  # Avaliação antiga: preço * U(0.9, 1.3) sorteado a cada chamada
         self.current_step       = 0
         self.waiting_steps      = 0 
-        self.action_space       = spaces.Discrete(3) # Espaço de Ação: 0 = Comprar, 1 = Esperar, 2 = Vender
-        self.observation_space  = spaces.Box(low=0, high=1, shape=(6,), dtype=np.float32) # Espaço de Observação: [preço do imóvel, metragem, IDH, taxa de criminalidade, infraestrutura, saldo do agente]
-        self.idh_bairros        = {
-            "AGUA RASA": 0.869,"ALTO DE PINHEIROS": 0.942,"ANHANGUERA": 0.731,
-            "ARICANDUVA": 0.758,"ARTUR ALVIM": 0.804,"BARRA FUNDA": 0.889,
-            "BELA VISTA": 0.889,"BELEM": 0.869,"BOM RETIRO": 0.889,
-            "BRAS": 0.869,"BRASILANDIA": 0.762,"BUTANTA": 0.859,
-            "CACHOEIRINHA": 0.799,"CAMBUCI": 0.889,"CAMPO BELO": 0.909,
-            "CAMPO GRANDE": 0.909,"CAMPO LIMPO": 0.783,"CANGAIBA": 0.804,
-            "CAPAO REDONDO": 0.783,"CARRAO": 0.758,"CASA VERDE": 0.799,
-            "CIDADE ADEMAR": 0.758,"CIDADE DUTRA": 0.758,"CIDADE LIDER": 0.758,
-            "CIDADE TIRADENTES": 0.708,"CONSOLACAO": 0.889,"CURSINO": 0.824,
-            "ERMELINO MATARAZZO": 0.777,"FREGUESIA DO O": 0.762,"GRAJAU": 0.758,
-            "GUAIANASES": 0.713,"IGUATEMI": 0.732,"IPIRANGA": 0.824,
-            "ITAIM BIBI": 0.942,"ITAIM PAULISTA": 0.725,"ITAQUERA": 0.758,
-            "JABAQUARA": 0.816,"JACANA": 0.869,"JAGUARA": 0.787,
-            "JAGUARE": 0.787,"JARAGUA": 0.787,"JARDIM ANGELA": 0.716,
-            "JARDIM HELENA": 0.736,"JARDIM PAULISTA": 0.942,"JARDIM SAO LUIS": 0.716,
-            "JOSE BONIFACIO": 0.758,"LAJEADO": 0.713,"LAPA": 0.906,
-            "LIBERDADE": 0.889,"LIMAO": 0.799,"MANDAQUI": 0.869,
-            "MARSILAC": 0.708,"MOEMA": 0.938,"MOOCA": 0.869,
-            "MORUMBI": 0.859,"PARELHEIROS": 0.708,"PARI": 0.869,
-            "PARQUE DO CARMO": 0.758,"PEDREIRA": 0.758,"PENHA": 0.804,
-            "PERDIZES": 0.906,"PERUS": 0.731,"PINHEIROS": 0.942,
-            "PIRITUBA": 0.787,"PONTE RASA": 0.777,"RAPOSO TAVARES": 0.859,
-            "REPUBLICA": 0.889,"RIO PEQUENO": 0.859,"SACOMA": 0.824,
-            "SANTA CECILIA": 0.889,"SANTANA": 0.869,"SANTO AMARO": 0.909,
-            "SAO DOMINGOS": 0.787,"SAO LUCAS": 0.758,"SAO MATEUS": 0.732,
-            "SAO MIGUEL": 0.736,"SAO RAFAEL": 0.732,"SAPOPEMBA": 0.758,
-            "SAUDE": 0.938,"SE": 0.889,"SOCORRO": 0.758,"TATUAPE": 0.869,
-            "TREMEMBE": 0.869,"TUCURUVI": 0.869,"VILA ANDRADE": 0.783,
-            "VILA CURUCA": 0.725,"VILA FORMOSA": 0.758,"VILA GUILHERME": 0.869,
-            "VILA JACUI": 0.736,"VILA LEOPOLDINA": 0.906,"VILA MARIA": 0.869,
-            "VILA MARIANA": 0.938,"VILA MATILDE": 0.804,"VILA MEDEIROS": 0.869,
-            "VILA PRUDENTE": 0.758,"VILA SONIA": 0.859
-            }
+        self.stale_after        = stale_after  # Passos no mercado (ou na carteira) a partir dos quais o imóvel se desgasta
+        self.stale_decay        = stale_decay  # Desvalorização por passo dos imóveis desgastados (0 = só a penalidade na venda)
+        self._aged_at           = 0  # Passo do último envelhecimento do mercado
+        if action_mode == "discrete":
+            self.action_space   = spaces.Discrete(3) # Espaço de Ação: 0 = Comprar, 1 = Esperar, 2 = Vender
+        elif action_mode == "multi":
+            # [0 = Comprar / 1 = Esperar / 2 = Vender, anúncio da janela a comprar, imóvel a vender]
+            # O imóvel a vender é a posição no ranking de ganho (sell_by="rank") ou a posição em
+            # `portfolio.indices()` (sell_by="slot"); `sell_ranks` é o número de opções em ambos os casos.
+            if sell_by not in ("rank", "slot"):
+                raise ValueError(f"sell_by desconhecido: {sell_by!r} (use 'rank' ou 'slot')")
+            self.action_space   = spaces.MultiDiscrete([3, action_window, sell_ranks])
+        else:
+            raise ValueError(f"action_mode desconhecido: {action_mode!r} (use 'discrete' ou 'multi')")
+        self.sell_by            = sell_by
+        self.idh_bairros        = dict(IDH_BAIRROS)  # IDH por bairro (distritos de São Paulo)
+        self.events             = MarketEventEngine()  # Motor de eventos (crise, metrô, shopping, criminalidade...)
+        self.last_event         = None
+        self.recent_events      = deque(maxlen=64)  # Índices dos últimos eventos sorteados
+        self.recent_sales       = deque(maxlen=64)  # Índices no mercado dos últimos imóveis vendidos
+        self.backends           = {}  # Backends de renderização já carregados (ver `environments.backends`)
+        # Observação configurável ("basic" = [preço do imóvel, demanda, IDH, taxa de criminalidade, infraestrutura, saldo do agente])
+        if observation is None and action_mode == "multi":
+            # O agente precisa ver os anúncios que pode comprar e, na venda por posição, a carteira
+            observation = {"listing": True, "window": action_window, "portfolio": True,
+                           "holdings": sell_ranks if sell_by == "slot" else 0}
+        self.observation_builder = make_observation(observation, len(self.idh_bairros), len(self.events.events))
+        if action_mode == "multi" and self.observation_builder.window < action_window:
+            raise ValueError(f"a observação mostra {self.observation_builder.window} anúncios, "
+                             f"menos que action_window={action_window}: use uma janela >= action_window")
+        self.observation_space  = self.observation_builder.space
+        self.copy_obs           = copy_obs  # False = devolve o buffer do `observation_builder` sem copiar (sobrescrito a cada passo)
         self.market             = self._generate_market()
+        self.bairro_index       = BairroIndex(self.market, len(self.idh_bairros))  # Agregados por bairro
+        # PerfStats opcional: cronômetros por fase e contadores (ver `get_perf_stats`)
+        self.perf               = _perf.PerfStats(ev.name for ev in self.events.events) if profile else None
 
 ###################################################################################################################
-    def _generate_market(self):
-        """Gera um bairro fictício de imóveis com características variadas, refletindo a realidade de São Paulo."""
-        market  = []
-        bairros = list(self.idh_bairros.keys())
-        for _ in range(100000):  # 100.000 imóveis
-            bairro = np.random.choice(bairros)
-            idh = self.idh_bairros.get(bairro, 0.8)  # Se não encontrar, assume IDH médio de 0.8
-            # Ajuste da distribuição de tipos de imóveis conforme o IDH do bairro
-            if idh > 0.85:
-                tipo_imovel = np.random.choice(
-                    ["Apartamento Padrão", "Casa de Luxo", "Cobertura"],
-                    p=[0.5, 0.3, 0.2]
-                )  # Mais apartamentos e coberturas em bairros ricos
-            elif idh > 0.75:
-                tipo_imovel = np.random.choice(
-                    ["Casa Popular", "Apartamento Padrão", "Casa de Luxo"],
-                    p=[0.3, 0.5, 0.2]
-                )  # Predomínio de apartamentos padrão e algumas casas de luxo
-            else:
-                tipo_imovel = np.random.choice(
-                    ["Casa Popular", "Apartamento Padrão"],
-                    p=[0.7, 0.3]
-                )  # Mais casas populares em bairros menos desenvolvidos
-
-            # Definição do preço médio do metro quadrado conforme o IDH
-            preco_m2_base = np.interp(idh, [0.7, 0.95], [2000, 15000])  # Entre R$ 1.000 e R$ 15.000/m²
-
-            # Ajuste das características do imóvel conforme o tipo
-            if tipo_imovel == "Casa Popular":
-                metragem = np.random.randint(80, 151)
-                preco = int(metragem * preco_m2_base * np.random.uniform(0.9, 1.1))
-                condominio = 0
-            elif tipo_imovel == "Apartamento Padrão":
-                metragem = np.random.randint(50, 101)
-                preco = int(metragem * preco_m2_base * np.random.uniform(0.9, 1.2))
-                condominio = np.random.randint(500, 1501)
-            elif tipo_imovel == "Casa de Luxo":
-                metragem = np.random.randint(200, 501)
-                preco = int(metragem * preco_m2_base * np.random.uniform(1.0, 1.3))
-                condominio = 0
-            else:  # Cobertura
-                metragem = np.random.randint(150, 401)
-                preco = int(metragem * preco_m2_base * np.random.uniform(1.2, 1.5))
-                condominio = np.random.randint(2000, 5001)
-
-            # Infraestrutura aumenta em bairros mais ricos
-            infraestrutura = np.interp(idh, [0.7, 0.95], [0.3, 1.0])  # Infraestrutura de 0.3 a 1.0
-
-            # Taxa de criminalidade diminui em bairros mais ricos
-            taxa_criminalidade = np.interp(idh, [0.7, 0.95], [1.0, 0.2])  # Criminalidade de 1.0 a 0.2
-
-            # Demanda do mercado varia conforme a atratividade do bairro
-            demanda = int(np.interp(idh, [0.7, 0.95], [300, 1000]) * np.random.uniform(0.8, 1.2))
-
-            # Criando o imóvel
-            property_data = {
-                "tipo": tipo_imovel,
-                "bairro": bairro,
-                "idh_microrregiao": idh,
-                "metragem": metragem,
-                "preco": preco,
-                "condominio": condominio,
-                "taxa_criminalidade": taxa_criminalidade,
-                "infraestrutura": infraestrutura,
-                "demanda": demanda,
-                "tempo_no_mercado": 0
-            }
-            market.append(property_data)
-
-        return market
+    def _generate_market(self, seed=None):
+        """Gera um bairro fictício de imóveis com características variadas, refletindo a realidade de São Paulo.
+
+        O mercado é colunar (um array por característica) e gerado em poucos sorteios vetorizados;
+        `self.market[i]` continua devolvendo uma visão em forma de dicionário do imóvel i.
+        Com `seed` o mercado é determinístico e, havendo `market_cache`, lido do cache em disco.
+        Com `lazy_market` apenas o primeiro bloco é gerado agora (ver `LazyMarket`); o cache não é usado.
+        """
+        if self.lazy_market:
+            if seed is None:
+                seed = int(self.np_random.integers(2**63))
+            return LazyMarket(self.idh_bairros, self.market_size, seed, self.events, self.chunk_size)
+        if seed is None:
+            return Market.generate(self.idh_bairros, size=self.market_size, rng=self.np_random)
+        if self.market_cache is not None:
+            return self.market_cache.load(self.idh_bairros, self.market_size, seed)
+        return Market.generate(self.idh_bairros, size=self.market_size, rng=market_rng(seed))
 ###################################################################################################################
 
     def _apply_market_events(self):
-        """Aplica eventos aleatórios que afetam o mercado imobiliário."""
-        event = np.random.choice(["crise", "metrô", "shopping", "criminalidade", "neutro"], p=[0.15, 0.2, 0.2, 0.15, 0.3])
-
-        for prop in self.market:
-            if event == "crise":
-                prop["preco"] *= np.random.uniform(0.85, 0.95)  # Queda de preços
-            elif event == "metrô" and prop["infraestrutura"] > 0.8:
-                prop["preco"] *= np.random.uniform(1.1, 1.3)  # Valorização nas áreas bem servidas
-            elif event == "shopping" and prop["demanda"] > 500:
-                prop["preco"] *= np.random.uniform(1.05, 1.2)  # Aumento da demanda
-            elif event == "criminalidade" and prop["taxa_criminalidade"] > 0.7:
-                prop["preco"] *= np.random.uniform(0.7, 0.9)  # Desvalorização em bairros perigosos
+        """Aplica eventos aleatórios que afetam o mercado imobiliário (atualização vetorizada dos preços)."""
+        event = self.events.sample(self.np_random)
+        idx, factors = self.market.apply_event(self.events, event, self.np_random)
+        self.bairro_index.apply_price_change(self.market, idx, factors)
+        self.last_event = self.events.events[event].name
+        self.recent_events.append(event)
+        self.portfolio.revalue(self.market.preco)
+        if self.perf is not None:
+            self.perf.count_event(event, self.events.events)
+        return self.last_event
+
+    def _age_market(self):
+        """Envelhece o mercado desde o último tick com uma operação vetorizada sobre `tempo_no_mercado`."""
+        elapsed = self.current_step - self._aged_at
+        self._aged_at = self.current_step
+        idx, factors = self.market.age(elapsed, self.stale_after, self.stale_decay)
+        if factors is not None:
+            self.bairro_index.apply_price_change(self.market, idx, factors)
+            self.portfolio.revalue(self.market.preco)
 ###################################################################################################################
 
     def _get_observation(self):
-        """Retorna o estado atual do ambiente como um vetor normalizado."""
-        if self.current_step >= len(self.market):
-            return np.zeros(self.observation_space.shape)
-
-        prop = self.market[self.current_step]
-        price = prop["preco"] / 5000000  # Normaliza para [0, 1]
-        demand = prop["demanda"] / 1000
-        idh = prop["idh_microrregiao"]
-        crime = prop["taxa_criminalidade"]
-        infra = prop["infraestrutura"]
-        cash_ratio = self.cash / 1000000  # Saldo normalizado [0, 1]
-
-        return np.array([price, demand, idh, crime, infra, cash_ratio], dtype=np.float32)
+        """Retorna o estado atual do ambiente como um vetor normalizado.
+
+        O `observation_builder` preenche sempre o mesmo buffer; por padrão o ambiente devolve uma cópia,
+        para que pares (obs, next_obs) guardados pelo chamador não se sobrescrevam. Com `copy_obs=False`
+        o próprio buffer é devolvido (sem alocação por passo, válido só até o próximo `step`/`reset`).
+        """
+        obs = self.observation_builder.build(self)
+        return obs.copy() if self.copy_obs else obs
 ###################################################################################################################
     
-    def _calculate_property_value(self):
-        """Calcula o valor total dos imóveis comprados com base no preço atualizado de mercado."""
-        total_property_value = sum(prop["preco"] * np.random.uniform(0.9, 1.3) for prop in self.owned_properties)
-        return total_property_value
+    @property
+    def owned_properties(self):
+        """Imóveis comprados como visões em forma de dicionário (compatibilidade com o código de renderização)."""
+        return [self.market[i] for i in self.portfolio.indices()]
+
+    def _calculate_property_value(self, noisy=None):
+        """Calcula o valor total dos imóveis comprados com base no preço atualizado de mercado.
+
+        Por padrão devolve o valor marcado a mercado mantido pela carteira (O(1)).
+        Com `noisy=True` (ou `noisy_valuation` no construtor) aplica a avaliação ruidosa original,
+        um fator U(0.9, 1.3) por imóvel, em um único gather vetorizado.
+        """
+        noisy = self.noisy_valuation if noisy is None else noisy
+        if not noisy:
+            return self.portfolio.value
+        precos = self.market.preco[self.portfolio.indices()]
+        return float((precos * self.np_random.uniform(0.9, 1.3, size=precos.size)).sum())
     
 ###################################################################################################################
     
     def step(self, action):
-        """Executa uma ação no ambiente e retorna (novo estado, recompensa, done, info)."""
+        """Executa uma ação no ambiente e retorna (novo estado, recompensa, done, info).
+
+        No modo "multi" a ação é (tipo, anúncio, escolha): compra o imóvel `current_step + anúncio`
+        ou vende o imóvel com o `escolha`-ésimo maior ganho não realizado (sell_by="rank", 0 = melhor)
+        ou o da posição `escolha` de `portfolio.indices()` (sell_by="slot"; posição vazia = não vende).
+        """
         if self.current_step >= len(self.market) - 1:
             return self._get_observation(), 0, True, {}
-        reward = 0
+        perf = self.perf
+        if perf is not None:
+            clock = perf.clock
+            start = clock()
+            perf.counters[_perf.STEPS] += 1
         done = False
-        prop = self.market[self.current_step]
-        price = prop["preco"]
-    
-        # Variável para contar imóveis vendidos no episódio
-        if not hasattr(self, 'num_vendidos_step'):
-            self.num_vendidos_step = 0
-    
-        #  Se o agente ficou esperando por mais de 20 episódios, força uma compra 
-        if self.waiting_steps >= 20:
-                action = 0  # Força a compra
-    
-        # 🏠 Número de imóveis antes da ação
-        previous_owned_count = len(self.owned_properties)
+        if perf is not None and self.waiting_steps >= _core.FORCE_AFTER:
+            perf.counters[_perf.FORCED_BUYS] += 1
+        if self.action_mode == "discrete":
+            reward, action, bought, sold = self._act(action)
+        else:
+            reward, action, bought, sold = self._act_multi(action)
+        if bought >= 0:
+            self.bairro_index.remove_listing(self.market.bairro[bought])
+            if perf is not None:
+                perf.counters[_perf.BUYS] += 1
+        if sold >= 0:
+            self.recent_sales.append(sold)
+            self.bairro_index.add_listing(self.market.bairro[sold])
+            if perf is not None:
+                perf.counters[_perf.SELLS] += 1
+
+        if perf is not None:
+            # O passo "market" fica zerado nos passos sem tick, para que `step_times` descreva só este passo
+            now = clock()
+            perf.add(_perf.ACTION, now - start)
+            perf.step_times[_perf.MARKET] = 0.0
+            start = now
+
+        event = -1
+        if self.current_step % _core.TICK == 0:
+            self.bairro_index.begin_tick(self.market)  # `variacao` soma o desgaste e o evento do tick
+            self._age_market()
+            self._apply_market_events()
+            self.bairro_index.end_tick()
+            event = self.recent_events[-1]
+            if perf is not None:
+                now = clock()
+                perf.add(_perf.MARKET, now - start)
+                start = now
     
+        self.current_step += 1
+        if self.recorder is not None:
+            self.recorder.record(self.current_step, action, reward, self.cash, self.portfolio.value,
+                                 len(self.portfolio), self.waiting_steps, event)
+            if perf is not None:
+                now = clock()
+                perf.add(_perf.RECORD, now - start)
+                start = now
+        obs = self._get_observation()
+        if perf is None:
+            return obs, reward, done, {}
+        perf.add(_perf.OBSERVATION, clock() - start)
+        return obs, reward, done, {
+            "perf": perf.step_times.copy(),        # Segundos por fase neste passo (ordem de perf.PHASES)
+            "perf_counters": perf.counters.copy(),  # Totais acumulados (ordem de perf.COUNTERS)
+            "perf_events": perf.events.copy(),      # Eventos disparados por tipo (ordem de env.events.events)
+        }
+
+    def _act(self, action):
+        """Modo discreto: regras de `core.act` sobre as colunas do mercado e a fila da carteira."""
+        self.market.ensure(self.current_step)
+        self.market.own()  # `act` escreve em `tempo_no_mercado`
+        state = _core.CoreState(None, self.market.preco, self.market.tempo_no_mercado, *self.portfolio.queue(),
+                                self.cash, self.current_step, self.waiting_steps, self._aged_at)
+        state, reward, action, bought, sold = _core.act(state, action, self.np_random)
+        self.portfolio.load_queue(state.owned, state.paid, state.head, state.tail, state.value)
+        self.cash, self.waiting_steps = state.cash, state.waiting
+        return reward, action, bought, sold
+
+    def _act_multi(self, action):
+        """Modo "multi": mesmas regras de `core.act` sobre a `Holdings`, com escolha do anúncio e do imóvel vendido."""
+        action, listing, choice = (int(a) for a in action)
+        target = min(self.current_step + listing, len(self.market) - 1)  # Anúncio escolhido
+        self.market.ensure(target)
+        price = float(self.market.preco[target])
+        reward, bought, sold = 0, -1, -1
+
+        if self.waiting_steps >= _core.FORCE_AFTER:
+            action = 0  # Força a compra
+
         if action == 0:  # Comprar
-            if self.cash >= price:
-                self.owned_properties.append(prop)
+            if self.cash >= price and target not in self.portfolio:
+                self.portfolio.buy(target, price)
+                self.market.own()
+                self.market.tempo_no_mercado[target] = 0  # Conta o tempo na carteira a partir da compra
                 self.cash -= price
-                reward = 1 + (200000 - price) / 50000  
-                self.waiting_steps = 0  # Reseta o contador de espera
-    
-        elif action == 2 and len(self.owned_properties) > 0:  # Vender
-            property_data = self.owned_properties.pop(0)
-            sell_price = property_data["preco"] * np.random.uniform(0.7, 1.5)
-    
-            if property_data.get("tempo_no_mercado", 0) > 10:
-                sell_price *= 0.9  
-    
-            reward = (sell_price - property_data["preco"]) / 10000
+                reward = _core.buy_reward(price)
+                self.waiting_steps = 0
+                bought = target
+
+        elif action == 2 and len(self.portfolio) > 0 and (self.sell_by == "rank" or choice < len(self.portfolio)):  # Vender
+            if self.sell_by == "slot":
+                sold = self.portfolio.sell(int(self.portfolio.indices()[choice]), self.market.preco)
+            else:
+                sold = self.portfolio.sell_ranked(choice, self.market.preco)
+            base = float(self.market.preco[sold])
+            sell_price = base * self.np_random.uniform(*_core.SALE_RANGE)
+            if self.market.tempo_no_mercado[sold] > _core.SALE_STALE:
+                sell_price *= _core.SALE_DISCOUNT
+            self.market.own()
+            self.market.tempo_no_mercado[sold] = 0  # Volta ao mercado como anúncio novo
+            reward = _core.sale_reward(sell_price, base)
             self.cash += sell_price
-            self.waiting_steps = 0  # Reseta o contador de espera
-    
+            self.waiting_steps = 0
+
         elif action == 1:  # Esperar
-            self.waiting_steps += 1  # Incrementa contador de espera
-        
-        if self.current_step % 10 == 0:
-            self._apply_market_events()
-    
-        self.current_step += 1
-        return self._get_observation(), reward, done, {}
+            self.waiting_steps += 1
+        return reward, action, bought, sold
 
-    
 ###################################################################################################################
     
     def render_grafs(self):
-        """Renderiza o ambiente visualmente usando matplotlib."""
+        """Renderiza o ambiente visualmente usando matplotlib.
+
+        Os gráficos (MetricsDashboard, no backend "dashboard") leem a trajetória do `recorder` e são
+        redesenhados no máximo uma vez a cada `dashboard_interval` segundos, com as séries longas decimadas por mín/máx.
+        """
         if self.render_mode == 'human':
-            profit = self.cash - self.initial_cash  # Lucro
-            total_property_value = self._calculate_property_value()
-            patrimonio_total = self.cash + total_property_value  # Patrimônio = Dinheiro + Valor dos imóveis
-            total_imoveis = len(self.owned_properties)  # Total de imóveis comprados
-            waitstep = self.waiting_steps  # Contador de espera
-            self.history.append((self.current_step, self.cash, patrimonio_total, total_imoveis, waitstep))
-            print(f"Passo {self.current_step} | Saldo: R${self.cash:.2f} | Imóveis: {total_imoveis} | Lucro: R${profit:.2f} | Patrimônio: R${patrimonio_total:.2f} | Esperando: {waitstep} passos")
-            if len(self.history) < 2:
-                return
-            if self.fig is None or self.axs is None:
-                plt.ion()
-                self.fig, self.axs = plt.subplots(2, 2, figsize=(12, 8))
-            self.axs[0, 0].clear()
-            self.axs[0, 1].clear()
-            self.axs[1, 0].clear()
-            self.axs[1, 1].clear()
-            steps, cash_values, patrimonio_values, imoveis_comprados, waitstep = zip(*self.history)
-            # 📈 Gráfico de saldo disponível
-            self.axs[0, 0].plot(steps, cash_values, label="Saldo Disponível", color="blue")
-            self.axs[0, 0].set_title("Saldo Disponível")
-            self.axs[0, 0].grid(True)
-            # 📈 Gráfico de patrimônio total
-            self.axs[0, 1].plot(steps, patrimonio_values, label="Patrimônio Total", color="green")
-            self.axs[0, 1].set_title("Patrimônio Total")
-            self.axs[0, 1].grid(True)
-            # 📊 Gráfico de número de imóveis comprados
-            self.axs[1, 0].plot(steps, imoveis_comprados, color="orange", label="Imóveis Comprados")
-            self.axs[1, 0].set_title("Número de Imóveis Comprados")
-            self.axs[1, 0].grid(True)
-            # 📊 Gráfico de contador de espera
-            self.axs[1, 1].plot(steps, waitstep, color="red", label="Imóveis Vendidos no Episódio")
-            self.axs[1, 1].set_title("Contador de Espera")
-            self.axs[1, 1].grid(True)
-
-            plt.tight_layout()
-            plt.pause(0.05)
+            start = self.perf.clock() if self.perf is not None else None
+            backend = self._backend("dashboard")
+            self.fig, self.axs = backend.dashboard.fig, backend.dashboard.axs
+            backend.render(self)
+            if start is not None:
+                self.perf.add(_perf.RENDER, self.perf.clock() - start)
+
+###################################################################################################################
+
+    def get_perf_stats(self, reset=False):
+        """Tempos por fase (totais e médias, em segundos), eventos por tipo e contadores de compras,
+        vendas e compras forçadas acumulados desde a criação (ou o último `reset=True`).
+        None se o ambiente foi criado sem `profile=True`. A cada passo, `info` traz os tempos do passo
+        (`"perf"`, ordem de `environments.perf.PHASES`), os contadores acumulados (`"perf_counters"`,
+        ordem de `COUNTERS`) e os eventos por tipo (`"perf_events"`)."""
+        if self.perf is None:
+            return None
+        stats = self.perf.as_dict()
+        if reset:
+            self.perf.clear()
+        return stats
+
+###################################################################################################################
+
+    def get_state(self):
+        """Snapshot do episódio para busca em árvore e rollouts contrafactuais.
+
+        Captura saldo, passo, contadores, estado do gerador, carteira, índice por bairro e mercado.
+        As colunas do mercado entram por referência com cópia-na-escrita (a primeira escrita depois
+        do snapshot copia a coluna), então o snapshot ocupa alguns KB e é criado e restaurado em microssegundos.
+        """
+        return {
+            "cash": self.cash,
+            "current_step": self.current_step,
+            "waiting_steps": self.waiting_steps,
+            "aged_at": self._aged_at,
+            "last_event": self.last_event,
+            "recent_events": tuple(self.recent_events),
+            "recent_sales": tuple(self.recent_sales),
+            "rng": self.np_random.bit_generator.state,
+            "portfolio": self.portfolio.copy(),
+            "market": self.market,
+            "market_columns": self.market.snapshot(),
+            "bairro_index": self.bairro_index.snapshot(),
+        }
+
+    def set_state(self, state):
+        """Restaura um snapshot de `get_state()`; o mesmo snapshot pode ser restaurado várias vezes."""
+        self.cash = state["cash"]
+        self.current_step = state["current_step"]
+        self.waiting_steps = state["waiting_steps"]
+        self._aged_at = state["aged_at"]
+        self.last_event = state["last_event"]
+        self.recent_events.clear()
+        self.recent_events.extend(state["recent_events"])
+        self.recent_sales.clear()
+        self.recent_sales.extend(state["recent_sales"])
+        self.np_random.bit_generator.state = state["rng"]
+        self.portfolio = state["portfolio"].copy()
+        self.market = state["market"]
+        self.market.restore(state["market_columns"])
+        self.bairro_index = state["bairro_index"].snapshot()
 
 ###################################################################################################################
     
-    def reset(self):
-        """Reseta o ambiente para um novo episódio."""
+    def reset(self, seed=None, options=None):
+        """Reseta o ambiente para um novo episódio.
+
+        `seed` semeia o gerador `self.np_random`, usado por todo o código estocástico do ambiente,
+        e fixa o mercado gerado (que pode então vir do `market_cache`).
+        """
+        super().reset(seed=seed)
         self.cash = 100000
-        self.owned_properties = []
+        self.portfolio.clear()
         self.current_step = 0
-        self.market = self._generate_market()
+        self.waiting_steps = 0
+        self._aged_at = 0
+        self.last_event = None
+        self.recent_events.clear()
+        self.recent_sales.clear()
+        self.market = self._generate_market(seed)
+        self.bairro_index = BairroIndex(self.market, len(self.idh_bairros))
         return self._get_observation()
 
 ###################################################################################################################
 
+    def _ensure_recorder(self):
+        """Gravador usado pelos gráficos: o `recorder` do usuário ou um temporário criado no primeiro
+        `render_grafs` (os gráficos começam nesse passo), apagado em `close()` ou na coleta do ambiente."""
+        if self.recorder is None:
+            from .recorder import TrajectoryRecorder
+            self.recorder = TrajectoryRecorder.temporary()
+            self._temp_recorder = True
+        return self.recorder
+
+    def _backend(self, name):
+        """Backend de renderização `name`, carregado (com suas dependências) no primeiro uso."""
+        backend = self.backends.get(name)
+        if backend is None:
+            backend = self.backends[name] = load_backend(name, self)
+        return backend
+
+    def render(self):
+        """Renderiza o estado atual com o backend do `render_mode`: janela pygame ("human"),
+        quadro RGB headless ("rgb_array") ou texto ("ansi"). Sem `render_mode` não faz nada."""
+        name = RENDER_BACKENDS.get(self.render_mode)
+        if name is None:
+            return None
+        if self.perf is None:
+            return self._backend(name).render(self)
+        start = self.perf.clock()
+        frame = self._backend(name).render(self)
+        self.perf.add(_perf.RENDER, self.perf.clock() - start)
+        return frame
+
     def render_pygame_v0(self):
-        import pygame
-
-        if not pygame.get_init():
-            pygame.init()
-
-        # Inicializa tela, fonte e clock apenas uma vez
-        if not hasattr(self, "screen"):
-            self.screen_width, self.screen_height = 800, 600
-            self.screen = pygame.display.set_mode((self.screen_width, self.screen_height))
-            pygame.display.set_caption("🏡 Real Estate RL Simulator")
-            self.font = pygame.font.SysFont("Arial", 18)
-            self.clock = pygame.time.Clock()
-
-        self.screen.fill((240, 240, 240))
-
-        if self.current_step >= len(self.market):
-            return
-
-        prop = self.market[self.current_step]
-        tipo = prop["tipo"]
-        bairro = prop["bairro"]
-        preco = prop["preco"]
-        metragem = prop["metragem"]
-        idh = prop["idh_microrregiao"]
-        crime = prop["taxa_criminalidade"]
-        infra = prop["infraestrutura"]
-
-        tipo_colors = {
-            "Casa Popular": (100, 149, 237),        # Azul
-            "Apartamento Padrão": (60, 179, 113),   # Verde
-            "Casa de Luxo": (255, 215, 0),          # Dourado
-            "Cobertura": (138, 43, 226)             # Roxo
-        }
-        color = tipo_colors.get(tipo, (200, 200, 200))
-
-        # Desenha o imóvel como um quadrado no centro
-        pygame.draw.rect(self.screen, color, pygame.Rect(350, 200, 100, 100))
-        pygame.draw.rect(self.screen, (0, 0, 0), pygame.Rect(350, 200, 100, 100), 2)
-
-        patrimonio = self.cash + self._calculate_property_value()
-        textos = [
-            f"🏘️ Tipo: {tipo}",
-            f"📍 Bairro: {bairro}",
-            f"💰 Preço: R${preco:,.0f}",
-            f"📐 Metragem: {metragem}m²",
-            f"🔢 IDH: {idh:.3f}",
-            f"🚨 Criminalidade: {crime:.2f}",
-            f"🏗️ Infraestrutura: {infra:.2f}",
-            f"💵 Saldo: R${self.cash:,.0f}",
-            f"📦 Imóveis: {len(self.owned_properties)}",
-            f"🧮 Patrimônio: R${patrimonio:,.0f}",
-            f"⏳ Espera: {self.waiting_steps}"
-        ]
-
-        for i, texto in enumerate(textos):
-            rendered = self.font.render(texto, True, (0, 0, 0))
-            self.screen.blit(rendered, (20, 20 + i * 25))
-
-        pygame.display.flip()
-        self.clock.tick(60)
+        """Mapa com os imóveis e o HUD do agente (ver `PygameRenderer`)."""
+        return self._backend("pygame").render(self)
 
 ###################################################################################################################
     def close_pygame(self):
-        pygame.quit()
+        backend = self.backends.pop("pygame", None)
+        if backend is not None:
+            backend.close()
+
+    def close(self):
+        if self._temp_recorder:
+            self.recorder.close()  # Remove o diretório temporário
+            self.recorder, self._temp_recorder = None, False
+        elif self.recorder is not None:
+            self.recorder.flush()
+        for backend in self.backends.values():
+            backend.close()
+        self.backends.clear()
 ###################################################################################################################
 
 
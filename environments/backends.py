@@ -0,0 +1,77 @@
+"""
+Backends de renderização do HomeChoiceEnv.
+
+Cada backend é criado na primeira renderização e só então importa suas dependências
+(pygame, matplotlib), de modo que um worker de treino sem `render_mode` carrega apenas
+NumPy e gymnasium. `RENDER_BACKENDS` diz qual backend atende cada `render_mode` em `env.render()`.
+"""
+###################################################################################################################
+def status_line(env):
+    """Resumo do passo atual em uma linha de texto."""
+    profit = env.cash - env.initial_cash  # Lucro
+    patrimonio_total = env.cash + env._calculate_property_value()  # Patrimônio = Dinheiro + Valor dos imóveis
+    return (f"Passo {env.current_step} | Saldo: R${env.cash:.2f} | Imóveis: {len(env.portfolio)} | "
+            f"Lucro: R${profit:.2f} | Patrimônio: R${patrimonio_total:.2f} | Esperando: {env.waiting_steps} passos")
+
+###################################################################################################################
+class AnsiBackend:
+    """Modo "ansi": devolve o resumo do passo como texto, sem dependências gráficas."""
+    def __init__(self, env):
+        pass
+
+    def render(self, env):
+        return status_line(env) + "\n"
+
+    def close(self):
+        pass
+
+
+class PygameBackend:
+    """Mapa pygame (ver `PygameRenderer`): janela no modo "human", quadro RGB headless no modo "rgb_array"."""
+    def __init__(self, env):
+        from .render import PygameRenderer
+        self.renderer = PygameRenderer(headless=env.render_mode == "rgb_array")
+
+    def render(self, env):
+        return self.renderer.render(env)
+
+    def close(self):
+        self.renderer.close()
+
+
+class DashboardBackend:
+    """Gráficos matplotlib do `render_grafs`: imprime o resumo do passo e atualiza o MetricsDashboard
+    com a trajetória do `recorder` do ambiente (ver `HomeChoiceEnv._ensure_recorder`)."""
+    def __init__(self, env):
+        from .dashboard import MetricsDashboard
+        self.dashboard = MetricsDashboard(env._ensure_recorder(), interval=env.dashboard_interval)
+
+    def render(self, env):
+        print(status_line(env))
+        self.dashboard.update()
+
+    def close(self):
+        self.dashboard.close()
+
+###################################################################################################################
+BACKENDS = {
+    "ansi": AnsiBackend,
+    "pygame": PygameBackend,
+    "dashboard": DashboardBackend,
+}
+
+# Backend usado por `env.render()` em cada `render_mode` (None = não renderiza)
+RENDER_BACKENDS = {
+    "human": "pygame",
+    "rgb_array": "pygame",
+    "ansi": "ansi",
+}
+
+
+def load_backend(name, env):
+    """Cria o backend `name` para `env`, importando só então suas dependências."""
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"backend de renderização desconhecido: {name!r}") from None
+    return backend(env)
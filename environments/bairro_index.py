@@ -0,0 +1,121 @@
+import copy
+
+import numpy as np
+
+###################################################################################################################
+class BairroIndex:
+    """
+    Índice por bairro do mercado colunar, construído na geração do mercado.
+    - `rows(code)`: linhas do mercado de um bairro (faixa contígua de um índice ordenado por bairro)
+    - `aggregates()`: consulta O(bairros) de [preço médio/m², estoque, demanda média, variação recente]
+
+    As somas por bairro são atualizadas de forma incremental com os imóveis tocados por cada
+    evento de mercado e por cada compra/venda, sem varrer o mercado inteiro. A cada
+    `resync_every` eventos as somas são recalculadas do zero para conter erro de arredondamento.
+    """
+    FEATURES = ("preco_m2", "estoque", "demanda", "variacao")
+
+    def __init__(self, market, num_bairros, resync_every=256):
+        self.num_bairros   = num_bairros
+        self.resync_every  = resync_every
+        self.covered       = 0  # Linhas do mercado já incluídas no índice
+        self.counts        = np.zeros(num_bairros, dtype=np.int64)
+        self.inventory     = np.zeros(num_bairros, dtype=np.int64)  # Imóveis do bairro que não estão na carteira do agente
+        self.sum_preco_m2  = np.zeros(num_bairros)
+        self.variacao      = np.zeros(num_bairros)  # Variação relativa do preço médio/m² no último tick (ou evento)
+        self._sum_demanda  = np.zeros(num_bairros)
+        self._inv_metragem = np.empty(0)
+        self._updates      = 0
+        self._tick_start   = None  # Preço médio/m² no início do tick corrente (ver `begin_tick`)
+        self._bairro       = None
+        self.order, self.offsets = None, None
+        self.sync(market)
+
+    def sync(self, market):
+        """Inclui no índice as linhas materializadas desde a última sincronização (mercado preguiçoso)."""
+        n = len(market.preco)
+        self._bairro = market.bairro  # Um mercado preguiçoso troca os arrays das colunas ao crescer
+        if n == self.covered:
+            return
+        new = slice(self.covered, n)
+        bairro = market.bairro[new]
+        counts = np.bincount(bairro, minlength=self.num_bairros)
+        self.counts += counts
+        self.inventory += counts
+        self._sum_demanda += np.bincount(bairro, weights=market.demanda[new], minlength=self.num_bairros)
+        self._inv_metragem = np.concatenate([self._inv_metragem, 1.0 / market.metragem[new]])
+        self.sum_preco_m2 += np.bincount(bairro, weights=market.preco[new] * self._inv_metragem[new], minlength=self.num_bairros)
+        self.covered = n
+        self.order = None  # O índice ordenado é refeito sob demanda
+
+    def _resync(self, market):
+        rows = slice(0, self.covered)
+        self.sum_preco_m2 = np.bincount(market.bairro[rows], weights=market.preco[rows] * self._inv_metragem, minlength=self.num_bairros)
+
+    def rows(self, code):
+        """Linhas do mercado pertencentes ao bairro `code`."""
+        if self.order is None:
+            self.order = np.argsort(self._bairro, kind="stable")
+            self.offsets = np.searchsorted(self._bairro[self.order], np.arange(self.num_bairros + 1))
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+    def mean_preco_m2(self):
+        return self.sum_preco_m2 / np.maximum(self.counts, 1)
+
+    @property
+    def mean_demanda(self):
+        return self._sum_demanda / np.maximum(self.counts, 1)
+
+###################################################################################################################
+    def apply_price_change(self, market, idx, factors):
+        """Atualiza as somas após um evento que multiplicou `preco[idx]` por `factors` (idx None = mercado inteiro)."""
+        covered = self.covered
+        before = self.mean_preco_m2() if self._tick_start is None else self._tick_start
+        self.sync(market)
+        if factors is not None:
+            self._updates += 1
+            if idx is None or self._updates % self.resync_every == 0:
+                # Choque no mercado inteiro custa o mesmo que um recálculo
+                self._resync(market)
+            else:
+                if covered < self.covered:
+                    keep = idx < covered  # Linhas novas já entraram no sync com o preço pós-evento
+                    idx, factors = idx[keep], factors[keep]
+                novo = market.preco[idx] * self._inv_metragem[idx]
+                delta = novo - novo / factors
+                self.sum_preco_m2 += np.bincount(market.bairro[idx], weights=delta, minlength=self.num_bairros)
+        self.variacao = np.divide(self.mean_preco_m2(), before, out=np.ones(self.num_bairros), where=before > 0) - 1
+
+    def begin_tick(self, market):
+        """Abre um tick do mercado: até `end_tick`, `variacao` mede a mudança acumulada desde aqui
+        (desgaste e evento juntos) em vez de só a da última chamada de `apply_price_change`."""
+        self.sync(market)
+        self._tick_start = self.mean_preco_m2()
+
+    def end_tick(self):
+        self._tick_start = None
+
+    def snapshot(self):
+        """Cópia do índice: só os arrays por bairro alterados no lugar são copiados (alguns KB)."""
+        snap = copy.copy(self)
+        for name in ("counts", "inventory", "sum_preco_m2", "variacao", "_sum_demanda"):
+            setattr(snap, name, getattr(self, name).copy())
+        return snap
+
+    def remove_listing(self, code):
+        """Imóvel do bairro `code` saiu do estoque (comprado pelo agente)."""
+        self.inventory[code] -= 1
+
+    def add_listing(self, code):
+        """Imóvel do bairro `code` voltou ao estoque (vendido pelo agente)."""
+        self.inventory[code] += 1
+
+    def aggregates(self, out=None):
+        """Matriz (bairros, 4) com [preço médio/m², estoque, demanda média, variação recente]."""
+        if out is None:
+            out = np.empty((self.num_bairros, len(self.FEATURES)))
+        out[:, 0] = self.mean_preco_m2()
+        out[:, 1] = self.inventory
+        out[:, 2] = self.mean_demanda
+        out[:, 3] = self.variacao
+        return out
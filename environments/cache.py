@@ -0,0 +1,116 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import market as market_module
+from .market import Market, generate_columns
+from .seeding import market_rng
+
+###################################################################################################################
+# Versão do gerador de mercado: incremente ao mudar `generate_columns` para invalidar caches antigos
+GENERATOR_VERSION = 3
+
+
+def market_key(idh_bairros, size, seed):
+    """Chave do cache: semente, tamanho, tabela de IDH e parâmetros do gerador.
+    Todas as constantes de `market` usadas por `generate_columns` entram na chave, assim como o
+    estado inicial do gerador de `market_rng(seed)` (que muda se a derivação da semente mudar)."""
+    params = {
+        "version": GENERATOR_VERSION,
+        "seed": seed,
+        "rng": market_rng(seed).bit_generator.state,
+        "size": size,
+        "idh_bairros": list(idh_bairros.items()),
+        "tipo_probs": market_module.TIPO_PROBS_POR_FAIXA.tolist(),
+        "metragem": [market_module.METRAGEM_MIN.tolist(), market_module.METRAGEM_MAX.tolist()],
+        "fator_preco": [market_module.FATOR_PRECO_MIN.tolist(), market_module.FATOR_PRECO_MAX.tolist()],
+        "condominio": [market_module.CONDOMINIO_MIN.tolist(), market_module.CONDOMINIO_MAX.tolist()],
+        "idh_intervalo": market_module.IDH_INTERVALO,
+        "preco_m2": market_module.PRECO_M2_INTERVALO,
+        "demanda": market_module.DEMANDA_INTERVALO,
+        "faixas_idh": market_module.FAIXAS_IDH,
+        "fator_demanda": market_module.FATOR_DEMANDA,
+        "dtypes": {name: np.dtype(dtype).str for name, dtype in market_module.COLUMN_DTYPES.items()},
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:32]
+
+###################################################################################################################
+class MarketCache:
+    """
+    Cache em disco de mercados gerados, indexado pela semente.
+    Cada mercado é gravado uma única vez como um `.npy` por coluna e reaberto com
+    `np.memmap` (modo cópia-na-escrita) nos resets seguintes e em outros processos:
+    as páginas limpas são compartilhadas e os eventos alteram só a cópia privada.
+    O diretório é limitado a `max_bytes`, removendo primeiro os mercados usados há mais tempo (LRU).
+    """
+    def __init__(self, directory, max_bytes=2 * 1024 ** 3):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.isdir(self._path(key))
+
+    def load(self, idh_bairros, size, seed):
+        """Retorna o mercado da semente `seed`, gerando e gravando-o se ainda não estiver no cache."""
+        key = market_key(idh_bairros, size, seed)
+        path = self._path(key)
+        if key not in self:
+            self._write(path, generate_columns(idh_bairros, size, market_rng(seed)))
+            self._evict(keep=key)
+        os.utime(path)  # Marca o uso para a política LRU
+        columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="c") for name in Market.COLUMNS}
+        return Market(columns, idh_bairros)
+
+    def _write(self, path, columns):
+        """Grava as colunas em um diretório temporário e o renomeia atomicamente."""
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix=".tmp-")
+        try:
+            for name, column in columns.items():
+                np.save(os.path.join(tmp, f"{name}.npy"), column)
+            os.rename(tmp, path)
+        except OSError:
+            # Outro processo gravou o mesmo mercado primeiro
+            if not os.path.isdir(path):
+                raise
+        finally:
+            if os.path.isdir(tmp):
+                shutil.rmtree(tmp, ignore_errors=True)
+
+    def entries(self):
+        """Lista (caminho, bytes, último uso) dos mercados em cache."""
+        result = []
+        for name in os.listdir(self.directory):
+            path = self._path(name)
+            if name.startswith(".") or not os.path.isdir(path):
+                continue
+            size = sum(entry.stat().st_size for entry in os.scandir(path))
+            result.append((path, size, os.stat(path).st_mtime))
+        return result
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def _evict(self, keep=None):
+        """Remove os mercados menos usados até o cache caber em `max_bytes`."""
+        entries = sorted(self.entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if os.path.basename(path) == keep:
+                continue
+            # Em Linux o arquivo removido continua válido para quem já o mapeou
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            shutil.rmtree(path, ignore_errors=True)
@@ -0,0 +1,249 @@
+"""
+Núcleo funcional do HomeChoiceEnv: `step(state, action, rng) -> (state, obs, reward, done)`.
+
+O estado é uma tupla de arrays NumPy de tamanho fixo e escalares: preços e `tempo_no_mercado`
+(colunas de M imóveis) e a fila da carteira em buffers `owned`/`paid` com início e fim. Os
+parâmetros do episódio (`CoreParams`) também são só arrays: colunas estáticas, tabela por bairro,
+probabilidades e faixas dos eventos e os imóveis afetados por cada evento, pré-calculados.
+Um passo custa o mesmo do começo ao fim do episódio, sem cópias proporcionais à carteira.
+
+Os arrays são escritos no lugar e o passo devolve a tupla com os escalares novos: para guardar
+ou bifurcar um estado (busca em árvore, avaliações "e se"), use `fork(state)` e copie o gerador.
+
+As regras de negociação (compra forçada, recompensas, penalidade de venda) ficam em `act`, que o
+HomeChoiceEnv usa no modo discreto; o envelhecimento é o mesmo `age_columns` do `Market.age`.
+"""
+from typing import NamedTuple
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from .events import MarketEventEngine
+from .market import IDH_BAIRROS, Market, age_columns
+from .portfolio import pop_owned, push_owned
+from .seeding import market_rng
+
+###################################################################################################################
+# Regras de negociação
+FORCE_AFTER   = 20          # Esperas seguidas que forçam uma compra
+SALE_RANGE    = (0.7, 1.5)  # Fator aleatório do preço de venda sobre o preço de mercado
+SALE_STALE    = 10          # Imóveis com mais passos no mercado (ou na carteira) vendem com desconto
+SALE_DISCOUNT = 0.9
+TICK          = 10          # Passos entre envelhecimentos/eventos de mercado
+
+
+def buy_reward(price):
+    """Recompensa da compra por `price` (escalar ou array)."""
+    return 1 + (200000 - price) / 50000
+
+
+def sale_reward(sell_price, base):
+    """Recompensa da venda por `sell_price` de um imóvel cotado a `base` (escalares ou arrays)."""
+    return (sell_price - base) / 10000
+
+###################################################################################################################
+class CoreParams(NamedTuple):
+    """Parte constante do estado, compartilhada por todos os estados de um episódio."""
+    bairro: np.ndarray        # Colunas estáticas do mercado usadas na observação
+    demanda: np.ndarray
+    idh: np.ndarray           # Tabela por bairro
+    crime: np.ndarray
+    infra: np.ndarray
+    event_p: np.ndarray       # Probabilidade de cada evento (normalizada)
+    event_low: np.ndarray     # Faixa do choque uniforme de cada evento (NaN = não mexe nos preços)
+    event_high: np.ndarray
+    selections: tuple         # Imóveis afetados por cada evento (None = mercado inteiro), pré-calculados
+    stale_after: int
+    stale_decay: float
+    initial_cash: float
+
+
+class CoreState(NamedTuple):
+    params: CoreParams
+    preco: np.ndarray             # (M,) preços atuais
+    tempo_no_mercado: np.ndarray  # (M,) passos no mercado (ou na carteira, desde a compra)
+    owned: np.ndarray             # Buffer da fila da carteira: owned[head:tail], do mais antigo ao mais recente
+    paid: np.ndarray              # Preço pago por cada imóvel de `owned`
+    head: int
+    tail: int
+    value: float                  # Valor de mercado da carteira
+    cash: float
+    step: int
+    waiting: int
+    aged_at: int                  # Passo do último envelhecimento
+
+
+def init_params(market, engine=None, stale_after=30, stale_decay=0.0, initial_cash=100000):
+    """Parâmetros do episódio para um mercado já gerado. Eventos com `shock` próprio não têm
+    faixa uniforme e não são suportados pelo núcleo."""
+    engine = engine if engine is not None else MarketEventEngine()
+    if any(ev.shock is not None for ev in engine.events):
+        raise ValueError("o núcleo funcional só aceita eventos com choque uniforme (low/high)")
+    nan = float("nan")
+    return CoreParams(
+        market.bairro, market.demanda, market.table.idh, market.table.crime, market.table.infra,
+        engine.probabilities(),
+        np.array([nan if ev.low is None else ev.low for ev in engine.events]),
+        np.array([nan if ev.high is None else ev.high for ev in engine.events]),
+        tuple(None if ev.mask is None else np.flatnonzero(ev.mask(market)) for ev in engine.events),
+        stale_after, stale_decay, initial_cash,
+    )
+
+
+def init_state(market, engine=None, stale_after=30, stale_decay=0.0, initial_cash=100000, capacity=64):
+    """Estado inicial para um mercado já gerado (os preços e tempos do mercado são copiados)."""
+    params = init_params(market, engine, stale_after, stale_decay, initial_cash)
+    return CoreState(params, market.preco.copy(), market.tempo_no_mercado.copy(),
+                     np.zeros(capacity, dtype=np.int64), np.zeros(capacity, dtype=np.float64),
+                     0, 0, 0.0, initial_cash, 0, 0, 0)
+
+
+def fork(state):
+    """Cópia independente de `state` (os passos escrevem nos arrays do estado)."""
+    return state._replace(preco=state.preco.copy(), tempo_no_mercado=state.tempo_no_mercado.copy(),
+                          owned=state.owned.copy(), paid=state.paid.copy())
+
+
+def owned_indices(state):
+    """Índices no mercado dos imóveis da carteira, do mais antigo ao mais recente."""
+    return state.owned[state.head:state.tail]
+
+
+def observation(state):
+    """Observação "basic": [preço, demanda, IDH, criminalidade, infraestrutura, saldo] normalizados."""
+    params, step = state.params, state.step
+    if step >= len(state.preco):
+        return np.zeros(6, dtype=np.float32)
+    code = params.bairro[step]
+    return np.array([
+        state.preco[step] / 5000000,
+        params.demanda[step] / 1000,
+        params.idh[code],
+        params.crime[code],
+        params.infra[code],
+        state.cash / 1000000,
+    ], dtype=np.float32)
+
+###################################################################################################################
+def act(state, action, rng):
+    """Aplica a ação do agente no anúncio `state.step`: compra forçada após FORCE_AFTER esperas,
+    compra, venda do imóvel mais antigo ou espera. Só usa os arrays e escalares do estado
+    (não `params`). Retorna (estado, recompensa, ação efetiva, imóvel comprado, imóvel vendido),
+    com -1 quando não houve compra ou venda."""
+    preco, tempo = state.preco, state.tempo_no_mercado
+    owned, paid, head, tail = state.owned, state.paid, state.head, state.tail
+    value, cash, waiting = state.value, state.cash, state.waiting
+    current = state.step
+    price = float(preco[current])
+    reward, bought, sold = 0, -1, -1
+
+    # Se o agente ficou esperando por FORCE_AFTER passos ou mais, força uma compra
+    if waiting >= FORCE_AFTER:
+        action = 0
+
+    if action == 0:  # Comprar
+        if cash >= price:
+            owned, paid, head, tail = push_owned(owned, paid, head, tail, current, price)
+            value += price
+            tempo[current] = 0  # Conta o tempo na carteira a partir da compra
+            cash -= price
+            reward = buy_reward(price)
+            waiting = 0
+            bought = current
+    elif action == 2 and tail > head:  # Vender o mais antigo
+        sold, head, tail = pop_owned(owned, head, tail)
+        base = float(preco[sold])
+        value = value - base if tail > head else 0.0
+        sell_price = base * rng.uniform(*SALE_RANGE)
+        if tempo[sold] > SALE_STALE:
+            sell_price *= SALE_DISCOUNT
+        tempo[sold] = 0  # Volta ao mercado como anúncio novo
+        reward = sale_reward(sell_price, base)
+        cash += sell_price
+        waiting = 0
+    elif action == 1:  # Esperar
+        waiting += 1
+
+    state = state._replace(owned=owned, paid=paid, head=head, tail=tail, value=value, cash=cash, waiting=waiting)
+    return state, reward, action, bought, sold
+
+
+def _apply_event(params, preco, event, rng):
+    """Multiplica no lugar os preços afetados pelo evento `event` (mesmos sorteios do MarketEventEngine)."""
+    low = params.event_low[event]
+    if np.isnan(low):
+        return
+    selection = params.selections[event]
+    if selection is None:
+        preco *= rng.uniform(low, params.event_high[event], size=preco.shape)
+    else:
+        preco[selection] *= rng.uniform(low, params.event_high[event], size=selection.size)
+
+
+def tick(state, rng):
+    """Envelhecimento desde o último tick e um evento de mercado sorteado; reavalia a carteira."""
+    params, preco = state.params, state.preco
+    age_columns(preco, state.tempo_no_mercado, state.step - state.aged_at, params.stale_after, params.stale_decay)
+    event = int(rng.choice(len(params.event_p), p=params.event_p))
+    _apply_event(params, preco, event, rng)
+    value = float(preco[owned_indices(state)].sum())
+    return state._replace(aged_at=state.step, value=value), event
+
+
+def step(state, action, rng):
+    """Avança um passo a partir de `state`. Retorna (novo estado, observação, recompensa, done).
+    Escreve nos arrays de `state` e avança `rng` no lugar: para bifurcar, `fork(state)` e copie o gerador."""
+    if state.step >= len(state.preco) - 1:
+        return state, observation(state), 0, True
+    state, reward, _, _, _ = act(state, action, rng)
+    if state.step % TICK == 0:
+        state, _ = tick(state, rng)
+    state = state._replace(step=state.step + 1)
+    return state, observation(state), reward, False
+
+
+def rollout(state, actions, rng):
+    """Executa uma sequência de ações a partir de `state`. Retorna (estado final, recompensas por passo)."""
+    rewards = np.zeros(len(actions), dtype=np.float64)
+    for t, action in enumerate(actions):
+        state, _, rewards[t], done = step(state, action, rng)
+        if done:
+            return state, rewards[:t + 1]
+    return state, rewards
+
+###################################################################################################################
+class CoreHomeChoiceEnv(gym.Env):
+    """
+    Casca gymnasium fina sobre o núcleo funcional: guarda apenas o `CoreState` atual.
+    `get_state()`/`set_state()` copiam os arrays do estado (`fork`), então um snapshot pode ser restaurado várias vezes.
+    """
+    def __init__(self, market_size=100000, idh_bairros=None, stale_after=30, stale_decay=0.0):
+        super().__init__()
+        self.market_size       = market_size
+        self.idh_bairros       = dict(idh_bairros if idh_bairros is not None else IDH_BAIRROS)
+        self.engine            = MarketEventEngine()
+        self.stale_after       = stale_after
+        self.stale_decay       = stale_decay
+        self.action_space      = spaces.Discrete(3)  # 0 = Comprar, 1 = Esperar, 2 = Vender
+        self.observation_space = spaces.Box(low=0, high=1, shape=(6,), dtype=np.float32)
+        self.state             = None
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        rng = market_rng(seed) if seed is not None else self.np_random
+        market = Market.generate(self.idh_bairros, size=self.market_size, rng=rng)
+        self.state = init_state(market, self.engine, self.stale_after, self.stale_decay)
+        return observation(self.state)
+
+    def step(self, action):
+        self.state, obs, reward, done = step(self.state, action, self.np_random)
+        return obs, reward, done, {}
+
+    def get_state(self):
+        return fork(self.state), self.np_random.bit_generator.state
+
+    def set_state(self, snapshot):
+        state, rng_state = snapshot
+        self.state = fork(state)
+        self.np_random.bit_generator.state = rng_state
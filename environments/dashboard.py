@@ -0,0 +1,115 @@
+import time
+
+import numpy as np
+
+###################################################################################################################
+class MinMaxDecimator:
+    """
+    Série decimada por mín/máx com memória limitada: os pontos são agrupados em baldes de
+    `bucket` amostras e cada balde guarda (x inicial, mínimo, máximo). Quando passa de
+    `max_buckets` baldes, vizinhos são fundidos e o tamanho do balde dobra, de modo que o
+    custo de desenho depende da largura da tela e não do comprimento da série.
+    Picos e vales nunca são perdidos, ao contrário de uma subamostragem simples.
+    """
+    def __init__(self, max_buckets=1000):
+        self.max_buckets = max_buckets
+        self.bucket = 1
+        self.x  = np.empty(0, dtype=np.float64)
+        self.lo = np.empty(0, dtype=np.float64)
+        self.hi = np.empty(0, dtype=np.float64)
+        self._tail_x = np.empty(0, dtype=np.float64)  # Amostras que ainda não completam um balde
+        self._tail_y = np.empty(0, dtype=np.float64)
+
+    def extend(self, x, y):
+        xs = np.concatenate([self._tail_x, np.asarray(x, dtype=np.float64)])
+        ys = np.concatenate([self._tail_y, np.asarray(y, dtype=np.float64)])
+        full = len(xs) // self.bucket * self.bucket
+        if full:
+            ys_full = ys[:full].reshape(-1, self.bucket)
+            self.x  = np.concatenate([self.x, xs[:full:self.bucket]])
+            self.lo = np.concatenate([self.lo, ys_full.min(axis=1)])
+            self.hi = np.concatenate([self.hi, ys_full.max(axis=1)])
+        self._tail_x, self._tail_y = xs[full:], ys[full:]
+        while len(self.x) > self.max_buckets:
+            self._merge()
+
+    def _merge(self):
+        """Funde baldes vizinhos dois a dois (um balde ímpar no fim é mantido como está)."""
+        pairs = len(self.x) // 2 * 2
+        self.x  = np.concatenate([self.x[:pairs:2], self.x[pairs:]])
+        self.lo = np.concatenate([self.lo[:pairs].reshape(-1, 2).min(axis=1), self.lo[pairs:]])
+        self.hi = np.concatenate([self.hi[:pairs].reshape(-1, 2).max(axis=1), self.hi[pairs:]])
+        self.bucket *= 2
+
+    def points(self):
+        """Pontos (x, y) para desenhar: mínimo e máximo de cada balde, incluindo o balde incompleto do fim."""
+        x, lo, hi = self.x, self.lo, self.hi
+        if len(self._tail_x):
+            x  = np.append(x, self._tail_x[0])
+            lo = np.append(lo, self._tail_y.min())
+            hi = np.append(hi, self._tail_y.max())
+        return np.repeat(x, 2), np.column_stack([lo, hi]).ravel()
+
+    def __len__(self):
+        return 2 * (len(self.x) + (len(self._tail_x) > 0))
+
+###################################################################################################################
+class MetricsDashboard:
+    """
+    Painel matplotlib das métricas do episódio, alimentado pelo TrajectoryRecorder.
+    Os eixos e linhas são criados uma única vez e atualizados no lugar (`set_data`);
+    a cada atualização só as linhas novas da trajetória são lidas e entram nas séries decimadas.
+    O desenho acontece no máximo uma vez a cada `interval` segundos de relógio, sem `plt.pause`,
+    então chamar `update()` a cada passo custa quase nada.
+    """
+    PANELS = (
+        ("Saldo Disponível", "blue"),
+        ("Patrimônio Total", "green"),
+        ("Número de Imóveis Comprados", "orange"),
+        ("Contador de Espera", "red"),
+    )
+
+    def __init__(self, recorder, interval=1.0, max_points=1000):
+        import matplotlib.pyplot as plt
+        self.plt      = plt
+        self.recorder = recorder
+        self.interval = interval
+        self.cursor   = 0  # Próxima linha da trajetória a ser lida
+        self.series   = [MinMaxDecimator(max_points // 2) for _ in self.PANELS]
+        self._last    = -np.inf
+
+        plt.ion()
+        self.fig, self.axs = plt.subplots(2, 2, figsize=(12, 8))
+        self.lines = []
+        for ax, (title, color) in zip(self.axs.flat, self.PANELS):
+            self.lines.append(ax.plot([], [], color=color)[0])
+            ax.set_title(title)
+            ax.grid(True)
+        self.fig.tight_layout()
+
+    def update(self, force=False):
+        """Lê as linhas novas e redesenha se passou `interval` desde o último desenho. Retorna True se desenhou."""
+        now = time.monotonic()
+        if not force and now - self._last < self.interval:
+            return False
+        self._last = now
+
+        new = self.recorder.read(self.cursor)
+        count = len(new["step"])
+        if count:
+            x = np.arange(self.cursor, self.cursor + count)  # Passo global (os passos do episódio recomeçam no reset)
+            values = (new["cash"], new["cash"] + new["value"], new["holdings"], new["waiting"])
+            for series, y in zip(self.series, values):
+                series.extend(x, y)
+            self.cursor += count
+
+        for ax, line, series in zip(self.axs.flat, self.lines, self.series):
+            line.set_data(*series.points())
+            ax.relim()
+            ax.autoscale_view()
+        self.fig.canvas.draw_idle()
+        self.fig.canvas.flush_events()
+        return True
+
+    def close(self):
+        self.plt.close(self.fig)
@@ -0,0 +1,143 @@
+import numpy as np
+
+###################################################################################################################
+# Máscaras de seleção dos eventos padrão (recebem o mercado colunar e devolvem um array booleano)
+def bem_servidos(market):
+    """Imóveis em áreas com boa infraestrutura."""
+    return (market.table.infra > 0.8)[market.bairro]  # Consulta por bairro: um gather de bytes
+
+
+def alta_demanda(market):
+    """Imóveis com demanda acima de 500."""
+    return market.demanda > 500
+
+
+def perigosos(market):
+    """Imóveis em bairros com criminalidade alta."""
+    return (market.table.crime > 0.7)[market.bairro]
+
+
+def _shock_prices(preco, selected, event, rng):
+    """Multiplica os preços selecionados pelos choques do evento. Retorna (índices planos, fatores).
+    Usa índices planos, bem mais rápidos que atribuição por máscara booleana."""
+    idx = np.flatnonzero(selected)
+    factors = event.draw(rng, idx.size)
+    flat = preco.reshape(-1)  # As colunas são C-contíguas: reshape devolve uma visão
+    flat[idx] *= factors
+    return idx, factors
+
+class _RowSubset:
+    """Visão preguiçosa de algumas linhas de um mercado empilhado, usada pelas máscaras dos eventos."""
+    def __init__(self, market, rows):
+        self._market = market
+        self._rows   = rows
+
+    def __getattr__(self, name):
+        value = getattr(self._market, name)
+        return value[self._rows] if isinstance(value, np.ndarray) else value
+
+###################################################################################################################
+class MarketEvent:
+    """
+    Evento de mercado: probabilidade de ocorrer, seleção dos imóveis afetados e choque multiplicativo no preço.
+    - mask: função market -> array booleano (None afeta todos os imóveis)
+    - low/high: limites do choque uniforme sorteado por imóvel
+    - shock: função (rng, size) -> multiplicadores, substitui low/high quando informada
+    Um evento sem choque (ex.: "neutro") não altera os preços.
+    """
+    def __init__(self, name, probability, mask=None, low=None, high=None, shock=None):
+        self.name        = name
+        self.probability = probability
+        self.mask        = mask
+        self.low         = low
+        self.high        = high
+        self.shock       = shock
+
+    @property
+    def affects_prices(self):
+        return self.shock is not None or self.low is not None
+
+    def draw(self, rng, size):
+        """Sorteia os multiplicadores de preço para `size` imóveis."""
+        if self.shock is not None:
+            return self.shock(rng, size)
+        return rng.uniform(self.low, self.high, size=size)
+
+    def __repr__(self):
+        return f"MarketEvent({self.name!r}, p={self.probability})"
+
+
+def default_events():
+    """Eventos originais do simulador, com as mesmas probabilidades e faixas."""
+    return [
+        MarketEvent("crise", 0.15, low=0.85, high=0.95),                             # Queda de preços
+        MarketEvent("metrô", 0.2, mask=bem_servidos, low=1.1, high=1.3),             # Valorização nas áreas bem servidas
+        MarketEvent("shopping", 0.2, mask=alta_demanda, low=1.05, high=1.2),         # Aumento da demanda
+        MarketEvent("criminalidade", 0.15, mask=perigosos, low=0.7, high=0.9),       # Desvalorização em bairros perigosos
+        MarketEvent("neutro", 0.3),
+    ]
+
+###################################################################################################################
+class MarketEventEngine:
+    """
+    Sorteia e aplica eventos de mercado como atualizações vetorizadas sobre a coluna de preços.
+    Novos tipos de evento podem ser adicionados com `register` sem alterar o loop do ambiente;
+    as probabilidades são normalizadas pela soma dos pesos registrados.
+    """
+    def __init__(self, events=None):
+        self.events = list(events) if events is not None else default_events()
+
+    def register(self, event):
+        """Adiciona um novo tipo de evento ao motor."""
+        if any(e.name == event.name for e in self.events):
+            raise ValueError(f"evento já registrado: {event.name}")
+        self.events.append(event)
+        return event
+
+    @property
+    def names(self):
+        return [e.name for e in self.events]
+
+    def probabilities(self):
+        p = np.array([e.probability for e in self.events], dtype=np.float64)
+        return p / p.sum()
+
+    def sample(self, rng, size=None):
+        """Sorteia o índice do próximo evento (ou um array de índices com `size`)."""
+        events = rng.choice(len(self.events), size=size, p=self.probabilities())
+        return int(events) if size is None else events
+
+    def apply(self, market, event, rng):
+        """Aplica o evento de índice `event` sobre os preços do mercado.
+        Retorna (índices afetados, fatores aplicados): índices None significam o mercado inteiro
+        e (None, None) um evento que não mexe nos preços."""
+        ev = self.events[event]
+        if not ev.affects_prices:
+            return None, None
+        if ev.mask is None:
+            factors = ev.draw(rng, market.preco.shape)
+            market.preco *= factors
+            return None, factors
+        return _shock_prices(market.preco, ev.mask(market), ev, rng)
+
+    def apply_batch(self, market, events, rng):
+        """Aplica um evento por linha de um mercado empilhado (N, M); `events[i] = -1` deixa a linha i intacta."""
+        width = market.preco.shape[-1]
+        flat = market.preco.reshape(-1)
+        for k, ev in enumerate(self.events):
+            rows = np.flatnonzero(events == k)
+            if not ev.affects_prices or rows.size == 0:
+                continue
+            if ev.mask is None:
+                market.preco[rows] *= ev.draw(rng, (rows.size, width))
+                continue
+            # Máscara calculada só nas linhas sorteadas para este evento
+            idx = np.flatnonzero(ev.mask(_RowSubset(market, rows)))
+            idx = rows[idx // width] * width + idx % width
+            flat[idx] *= ev.draw(rng, idx.size)
+
+    def step(self, market, rng):
+        """Sorteia um evento, aplica-o ao mercado e retorna seu nome."""
+        event = self.sample(rng)
+        self.apply(market, event, rng)
+        return self.events[event].name
@@ -0,0 +1,109 @@
+import os
+
+import numpy as np
+
+###################################################################################################################
+# Geometria pré-processada dos distritos (gerada por GEO/transform/build_geometry.py)
+DEFAULT_GEOMETRY_PATH = os.path.join(os.path.dirname(__file__), "GEO", "maps", "SP.npz")
+
+
+def rasterize(coords, offsets, ring_district, width, height):
+    """Rasteriza os anéis dos distritos (regra par-ímpar) em uma grade (altura, largura) de códigos.
+    Cada pixel recebe o índice do distrito que contém seu centro, ou -1 fora do mapa."""
+    raster = np.full((height, width), -1, dtype=np.int16)
+    centers = np.arange(width) + 0.5
+    for ring, district in enumerate(ring_district):
+        pts = coords[offsets[ring]:offsets[ring + 1]]
+        x0, y0 = pts[:-1, 0], pts[:-1, 1]
+        x1, y1 = pts[1:, 0], pts[1:, 1]
+        top = max(int(np.floor(pts[:, 1].min())), 0)
+        bottom = min(int(np.ceil(pts[:, 1].max())), height)
+        for row in range(top, bottom):
+            y = row + 0.5
+            crossing = (y0 <= y) != (y1 <= y)
+            xs = np.sort(x0[crossing] + (y - y0[crossing]) * (x1[crossing] - x0[crossing]) / (y1[crossing] - y0[crossing]))
+            # Pixels cujo centro cruza um número ímpar de arestas à esquerda estão dentro do anel
+            inside = np.searchsorted(xs, centers) % 2 == 1
+            raster[row, inside] = np.where(raster[row, inside] == district, -1, district)
+    return raster
+
+###################################################################################################################
+class DistrictMap:
+    """
+    Contornos dos distritos de São Paulo em coordenadas de tela, carregados de um `.npz` compacto:
+    - coords:        todos os vértices (V, 2) em float32, anel após anel
+    - offsets:       início de cada anel em `coords` (R + 1)
+    - ring_district: distrito de cada anel (R)
+    - names:         nome de cada distrito (mesma grafia das chaves de IDH_BAIRROS)
+    - pixels/pixel_offsets: pixels (y * largura + x) de cada distrito, agrupados por distrito,
+      o índice espacial usado para sortear posições dentro do distrito de cada imóvel.
+    """
+    def __init__(self, coords, offsets, ring_district, names, width, height, pixels, pixel_offsets):
+        self.coords        = coords
+        self.offsets       = offsets
+        self.ring_district = ring_district
+        self.names         = tuple(str(name) for name in names)
+        self.width         = int(width)
+        self.height        = int(height)
+        self.pixels        = pixels
+        self.pixel_offsets = pixel_offsets
+        self._codes        = {}  # Cache: tupla de bairros do mercado -> distrito de cada código
+
+    @classmethod
+    def load(cls, path=DEFAULT_GEOMETRY_PATH):
+        """Carrega a geometria pré-processada (None se o arquivo ainda não foi gerado)."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+    def save(self, path):
+        np.savez_compressed(
+            path, coords=self.coords, offsets=self.offsets, ring_district=self.ring_district,
+            names=np.array(self.names), width=self.width, height=self.height,
+            pixels=self.pixels, pixel_offsets=self.pixel_offsets,
+        )
+
+    @classmethod
+    def from_rings(cls, rings, ring_names, width, height):
+        """Monta o mapa a partir de anéis [(x, y), ...] e do nome do distrito de cada anel."""
+        names = sorted(set(ring_names))
+        index = {name: i for i, name in enumerate(names)}
+        coords = np.concatenate([np.asarray(ring, dtype=np.float32) for ring in rings])
+        offsets = np.concatenate([[0], np.cumsum([len(ring) for ring in rings])]).astype(np.int64)
+        ring_district = np.array([index[name] for name in ring_names], dtype=np.int16)
+        raster = rasterize(coords, offsets, ring_district, width, height).ravel()
+        inside = np.flatnonzero(raster >= 0)
+        pixels = inside[np.argsort(raster[inside], kind="stable")].astype(np.int32)
+        pixel_offsets = np.searchsorted(raster[pixels], np.arange(len(names) + 1)).astype(np.int64)
+        return cls(coords, offsets, ring_district, names, width, height, pixels, pixel_offsets)
+
+    def polygons(self):
+        """Anéis como listas de pares (x, y), no formato aceito por `pygame.draw.polygon`."""
+        return [self.coords[self.offsets[i]:self.offsets[i + 1]].tolist() for i in range(len(self.offsets) - 1)]
+
+###################################################################################################################
+    def district_codes(self, bairros):
+        """Distrito do mapa correspondente a cada código de bairro do mercado (-1 se o bairro não está no mapa)."""
+        key = tuple(bairros)
+        codes = self._codes.get(key)
+        if codes is None:
+            index = {name: i for i, name in enumerate(self.names)}
+            codes = self._codes[key] = np.array([index.get(name, -1) for name in key], dtype=np.int64)
+        return codes
+
+    def sample(self, districts, u):
+        """Posições (x, y) dentro dos distritos `districts`, a partir de uniformes `u` de formato (n, 3).
+        Sorteia um pixel do distrito e um ponto dentro do pixel; distritos fora do mapa (-1) caem em
+        qualquer pixel do mapa. Tudo vetorizado: um gather por coluna."""
+        districts = np.asarray(districts)
+        code = np.maximum(districts, 0)
+        start = self.pixel_offsets[code]
+        stop = self.pixel_offsets[code + 1]
+        anywhere = (districts < 0) | (stop <= start)
+        start = np.where(anywhere, 0, start)
+        stop = np.where(anywhere, len(self.pixels), stop)
+        pixel = self.pixels[np.minimum(start + (u[:, 0] * (stop - start)).astype(np.int64), len(self.pixels) - 1)]
+        x = pixel % self.width + u[:, 1]
+        y = pixel // self.width + u[:, 2]
+        return np.stack([x, y], axis=-1)
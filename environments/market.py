@@ -0,0 +1,461 @@
+from collections.abc import MutableMapping
+import numpy as np
+
+###################################################################################################################
+# IDH por bairro (distritos de São Paulo)
+IDH_BAIRROS = {
+    "AGUA RASA": 0.869,"ALTO DE PINHEIROS": 0.942,"ANHANGUERA": 0.731,
+    "ARICANDUVA": 0.758,"ARTUR ALVIM": 0.804,"BARRA FUNDA": 0.889,
+    "BELA VISTA": 0.889,"BELEM": 0.869,"BOM RETIRO": 0.889,
+    "BRAS": 0.869,"BRASILANDIA": 0.762,"BUTANTA": 0.859,
+    "CACHOEIRINHA": 0.799,"CAMBUCI": 0.889,"CAMPO BELO": 0.909,
+    "CAMPO GRANDE": 0.909,"CAMPO LIMPO": 0.783,"CANGAIBA": 0.804,
+    "CAPAO REDONDO": 0.783,"CARRAO": 0.758,"CASA VERDE": 0.799,
+    "CIDADE ADEMAR": 0.758,"CIDADE DUTRA": 0.758,"CIDADE LIDER": 0.758,
+    "CIDADE TIRADENTES": 0.708,"CONSOLACAO": 0.889,"CURSINO": 0.824,
+    "ERMELINO MATARAZZO": 0.777,"FREGUESIA DO O": 0.762,"GRAJAU": 0.758,
+    "GUAIANASES": 0.713,"IGUATEMI": 0.732,"IPIRANGA": 0.824,
+    "ITAIM BIBI": 0.942,"ITAIM PAULISTA": 0.725,"ITAQUERA": 0.758,
+    "JABAQUARA": 0.816,"JACANA": 0.869,"JAGUARA": 0.787,
+    "JAGUARE": 0.787,"JARAGUA": 0.787,"JARDIM ANGELA": 0.716,
+    "JARDIM HELENA": 0.736,"JARDIM PAULISTA": 0.942,"JARDIM SAO LUIS": 0.716,
+    "JOSE BONIFACIO": 0.758,"LAJEADO": 0.713,"LAPA": 0.906,
+    "LIBERDADE": 0.889,"LIMAO": 0.799,"MANDAQUI": 0.869,
+    "MARSILAC": 0.708,"MOEMA": 0.938,"MOOCA": 0.869,
+    "MORUMBI": 0.859,"PARELHEIROS": 0.708,"PARI": 0.869,
+    "PARQUE DO CARMO": 0.758,"PEDREIRA": 0.758,"PENHA": 0.804,
+    "PERDIZES": 0.906,"PERUS": 0.731,"PINHEIROS": 0.942,
+    "PIRITUBA": 0.787,"PONTE RASA": 0.777,"RAPOSO TAVARES": 0.859,
+    "REPUBLICA": 0.889,"RIO PEQUENO": 0.859,"SACOMA": 0.824,
+    "SANTA CECILIA": 0.889,"SANTANA": 0.869,"SANTO AMARO": 0.909,
+    "SAO DOMINGOS": 0.787,"SAO LUCAS": 0.758,"SAO MATEUS": 0.732,
+    "SAO MIGUEL": 0.736,"SAO RAFAEL": 0.732,"SAPOPEMBA": 0.758,
+    "SAUDE": 0.938,"SE": 0.889,"SOCORRO": 0.758,"TATUAPE": 0.869,
+    "TREMEMBE": 0.869,"TUCURUVI": 0.869,"VILA ANDRADE": 0.783,
+    "VILA CURUCA": 0.725,"VILA FORMOSA": 0.758,"VILA GUILHERME": 0.869,
+    "VILA JACUI": 0.736,"VILA LEOPOLDINA": 0.906,"VILA MARIA": 0.869,
+    "VILA MARIANA": 0.938,"VILA MATILDE": 0.804,"VILA MEDEIROS": 0.869,
+    "VILA PRUDENTE": 0.758,"VILA SONIA": 0.859
+}
+
+# Tipos de imóveis (o índice na tupla é o código armazenado na coluna "tipo")
+TIPOS_IMOVEL = ("Casa Popular", "Apartamento Padrão", "Casa de Luxo", "Cobertura")
+
+# Probabilidade de cada tipo por faixa de IDH: [IDH <= 0.75, 0.75 < IDH <= 0.85, IDH > 0.85]
+TIPO_PROBS_POR_FAIXA = np.array([
+    [0.7, 0.3, 0.0, 0.0],  # Mais casas populares em bairros menos desenvolvidos
+    [0.3, 0.5, 0.2, 0.0],  # Predomínio de apartamentos padrão e algumas casas de luxo
+    [0.0, 0.5, 0.3, 0.2],  # Mais apartamentos e coberturas em bairros ricos
+])
+
+# Atributos do bairro interpolados linearmente a partir do IDH, entre IDH_INTERVALO[0] e IDH_INTERVALO[1]
+IDH_INTERVALO      = (0.7, 0.95)
+INFRA_INTERVALO    = (0.3, 1.0)      # Infraestrutura aumenta em bairros mais ricos
+CRIME_INTERVALO    = (1.0, 0.2)      # Criminalidade diminui em bairros mais ricos
+PRECO_M2_INTERVALO = (2000, 15000)   # Preço médio do metro quadrado (R$/m²)
+DEMANDA_INTERVALO  = (300, 1000)     # Demanda base do mercado
+FAIXAS_IDH         = (0.75, 0.85)    # Limites das faixas de IDH de TIPO_PROBS_POR_FAIXA
+
+# Variação da demanda de cada imóvel em torno da demanda base do bairro
+FATOR_DEMANDA = (0.8, 1.2)
+
+# Características por tipo (mesma ordem de TIPOS_IMOVEL)
+METRAGEM_MIN    = np.array([80, 50, 200, 150])
+METRAGEM_MAX    = np.array([150, 100, 500, 400])
+FATOR_PRECO_MIN = np.array([0.9, 0.9, 1.0, 1.2])
+FATOR_PRECO_MAX = np.array([1.1, 1.2, 1.3, 1.5])
+CONDOMINIO_MIN  = np.array([0, 500, 0, 2000])
+CONDOMINIO_MAX  = np.array([0, 1500, 0, 5000])
+
+# Colunas do mercado e seus tipos NumPy (tipo e bairro são códigos de 1 byte)
+COLUMN_DTYPES = {
+    "tipo": np.uint8,
+    "bairro": np.uint8,
+    "metragem": np.int16,
+    "preco": np.float64,
+    "condominio": np.int16,
+    "demanda": np.int16,
+    "tempo_no_mercado": np.int32,
+}
+
+# Colunas alteradas durante o episódio (eventos, desgaste, compras e vendas); as demais são imutáveis
+MUTABLE_COLUMNS = ("preco", "tempo_no_mercado")
+
+# Atributos que dependem só do bairro: ficam na BairroTable, um valor por bairro, e não em cada imóvel
+BAIRRO_COLUMNS = ("idh", "crime", "infra", "preco_m2_base")
+
+# Chaves do dicionário de imóvel -> coluna do mercado
+PROPERTY_KEYS = {
+    "tipo": "tipo",
+    "bairro": "bairro",
+    "idh_microrregiao": "idh",
+    "metragem": "metragem",
+    "preco": "preco",
+    "condominio": "condominio",
+    "taxa_criminalidade": "crime",
+    "infraestrutura": "infra",
+    "demanda": "demanda",
+    "tempo_no_mercado": "tempo_no_mercado",
+}
+
+###################################################################################################################
+class BairroTable:
+    """
+    Tabela de consulta com os atributos derivados do IDH de cada bairro, indexada pelo código
+    uint8 da coluna "bairro": `table.infra[market.bairro]` vale o mesmo que a antiga coluna por imóvel.
+    """
+    def __init__(self, idh_bairros):
+        self.names = tuple(idh_bairros)
+        self.idh   = np.array([idh_bairros[b] for b in self.names], dtype=np.float64)
+        # Infraestrutura aumenta e criminalidade diminui em bairros mais ricos
+        self.infra = np.interp(self.idh, IDH_INTERVALO, INFRA_INTERVALO)
+        self.crime = np.interp(self.idh, IDH_INTERVALO, CRIME_INTERVALO)
+        # Preço médio do metro quadrado conforme o IDH
+        self.preco_m2_base = np.interp(self.idh, IDH_INTERVALO, PRECO_M2_INTERVALO)
+        # Demanda base do mercado conforme a atratividade do bairro
+        self.demanda_base = np.interp(self.idh, IDH_INTERVALO, DEMANDA_INTERVALO)
+        # Faixa de IDH usada na distribuição dos tipos: [IDH <= 0.75, 0.75 < IDH <= 0.85, IDH > 0.85]
+        self.faixa = (self.idh > FAIXAS_IDH[0]).astype(np.intp) + (self.idh > FAIXAS_IDH[1])
+
+    def __len__(self):
+        return len(self.names)
+
+###################################################################################################################
+def generate_columns(idh_bairros, size, rng=None):
+    """Gera as colunas de um mercado com `size` imóveis em poucos sorteios vetorizados.
+    `size` pode ser uma tupla (N, M) para gerar N mercados empilhados de uma vez.
+    `rng` é o `np.random.Generator` usado nos sorteios (um novo gerador não semeado por padrão).
+    `idh_bairros` pode ser o dicionário de IDH ou uma BairroTable já construída."""
+    rng = rng if rng is not None else np.random.default_rng()
+    table = idh_bairros if isinstance(idh_bairros, BairroTable) else BairroTable(idh_bairros)
+
+    bairro = rng.integers(0, len(table), size=size).astype(np.uint8)
+
+    # Tipo do imóvel sorteado pela distribuição acumulada da faixa de IDH
+    cdf = np.cumsum(TIPO_PROBS_POR_FAIXA, axis=1)[table.faixa[bairro]]
+    tipo = (rng.uniform(size=size)[..., None] >= cdf).sum(axis=-1).astype(np.uint8)
+
+    metragem = rng.integers(METRAGEM_MIN[tipo], METRAGEM_MAX[tipo], endpoint=True)
+    fator = rng.uniform(FATOR_PRECO_MIN[tipo], FATOR_PRECO_MAX[tipo])
+    preco = np.floor(metragem * table.preco_m2_base[bairro] * fator)
+    condominio = rng.integers(CONDOMINIO_MIN[tipo], CONDOMINIO_MAX[tipo], endpoint=True)
+
+    # Demanda do mercado varia conforme a atratividade do bairro
+    demanda = table.demanda_base[bairro] * rng.uniform(*FATOR_DEMANDA, size=size)
+
+    return {
+        "tipo": tipo,
+        "bairro": bairro,
+        "metragem": metragem.astype(np.int16),
+        "preco": preco,
+        "condominio": condominio.astype(np.int16),
+        "demanda": demanda.astype(np.int16),
+        "tempo_no_mercado": np.zeros(size, dtype=np.int32),
+    }
+
+def age_columns(preco, tempo_no_mercado, elapsed, stale_after=30, decay=0.0):
+    """Envelhecimento no lugar: soma `elapsed` passos a `tempo_no_mercado` e desvaloriza em (1 - decay)
+    por passo os imóveis com mais de `stale_after` passos. Retorna (índices desvalorizados, fator),
+    ou (None, None) sem desgaste. Usado pelo `Market.age` e pelo núcleo funcional (environments/core.py)."""
+    tempo_no_mercado += elapsed
+    if not decay or elapsed <= 0:
+        return None, None
+    stale = np.flatnonzero(tempo_no_mercado > stale_after)
+    factor = (1 - decay) ** elapsed
+    preco[stale] *= factor
+    return stale, factor
+
+###################################################################################################################
+class Market:
+    """
+    Mercado imobiliário em formato colunar (struct-of-arrays).
+    Cada característica dos imóveis é um array NumPy; `market[i]` devolve uma visão
+    em forma de dicionário para o código que ainda trabalha imóvel a imóvel.
+    No ambiente vetorizado as colunas têm formato (N, M) e apenas o acesso colunar é usado.
+
+    Os atributos do bairro (IDH, infraestrutura, criminalidade) vêm da `table`: `market.infra`
+    ainda devolve a coluna completa, mas o código quente usa `take()` ou a tabela diretamente.
+    """
+    COLUMNS = tuple(COLUMN_DTYPES)
+
+    def __init__(self, columns, idh_bairros):
+        self.table   = idh_bairros if isinstance(idh_bairros, BairroTable) else BairroTable(idh_bairros)
+        self.bairros = self.table.names
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+        self.extras = {}  # Atributos extras por imóvel (ex.: "pos" do mapa), indexados pela linha
+        self._shared = False  # Colunas mutáveis referenciadas por um snapshot: copiar antes de escrever
+
+    @classmethod
+    def generate(cls, idh_bairros, size=100000, rng=None):
+        """Gera um mercado aleatório com `size` imóveis."""
+        table = BairroTable(idh_bairros)
+        return cls(generate_columns(table, size, rng), table)
+
+    def columns(self):
+        """Retorna as colunas como dicionário nome -> array."""
+        return {name: getattr(self, name) for name in self.COLUMNS}
+
+    @property
+    def nbytes(self):
+        """Memória ocupada pelas colunas (a BairroTable tem tamanho fixo, um valor por bairro)."""
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS)
+
+    def take(self, name, index):
+        """Valores da coluna `name` nas linhas `index`; atributos do bairro são lidos da tabela."""
+        if name in BAIRRO_COLUMNS:
+            return getattr(self.table, name)[self.bairro[index]]
+        return getattr(self, name)[index]
+
+    @property
+    def idh(self):
+        return self.table.idh[self.bairro]
+
+    @property
+    def crime(self):
+        return self.table.crime[self.bairro]
+
+    @property
+    def infra(self):
+        return self.table.infra[self.bairro]
+
+    def ensure(self, index):
+        """Garante que as colunas cubram o imóvel `index` (o mercado completo já cobre todos)."""
+
+###################################################################################################################
+    def snapshot(self):
+        """Captura as colunas mutáveis por referência (cópia-na-escrita): custa O(1), sem copiar dados."""
+        self._shared = True
+        return {name: getattr(self, name) for name in MUTABLE_COLUMNS}
+
+    def restore(self, snapshot):
+        """Volta às colunas de um `snapshot()`. O snapshot continua válido e pode ser restaurado de novo."""
+        for name, column in snapshot.items():
+            setattr(self, name, column)
+        self._shared = True
+
+    def own(self):
+        """Copia as colunas mutáveis se um snapshot ainda as referencia. Chame antes de escrever nelas."""
+        if self._shared:
+            for name in MUTABLE_COLUMNS:
+                setattr(self, name, getattr(self, name).copy())
+            self._shared = False
+
+    def apply_event(self, engine, event, rng):
+        """Aplica o evento `event` do MarketEventEngine aos preços. Retorna (índices afetados, fatores)."""
+        self.own()
+        return engine.apply(self, event, rng)
+
+    def age(self, elapsed, stale_after=30, decay=0.0, rows=None):
+        """Soma `elapsed` passos ao `tempo_no_mercado` de todos os imóveis (ou das linhas `rows` de um
+        mercado empilhado) e desvaloriza em (1 - decay) por passo os que passaram de `stale_after`.
+        Retorna (índices planos desvalorizados, fatores), ou (None, None) sem desgaste."""
+        self.own()
+        if rows is None:
+            stale, factor = age_columns(self.preco, self.tempo_no_mercado, elapsed, stale_after, decay)
+            return (None, None) if stale is None else (stale, np.full(stale.size, factor))
+        self.tempo_no_mercado[rows] += elapsed
+        if not decay or elapsed <= 0:
+            return None, None
+        tempo = self.tempo_no_mercado[rows]
+        stale = np.flatnonzero(tempo > stale_after)
+        width = tempo.shape[-1]
+        stale = rows[stale // width] * width + stale % width
+        factor = (1 - decay) ** elapsed
+        self.preco.reshape(-1)[stale] *= factor
+        return stale, np.full(stale.size, factor)
+
+    def __len__(self):
+        return len(self.preco)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de imóvel fora do mercado")
+        self.ensure(index)
+        return PropertyView(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+###################################################################################################################
+class LazyMarket(Market):
+    """
+    Mercado materializado preguiçosamente em blocos de `chunk_size` imóveis, à medida que o episódio avança.
+    `len(market)` é o tamanho lógico; as colunas (`market.preco`, ...) cobrem apenas o prefixo já criado.
+    Cada bloco é gerado por um fluxo aleatório próprio derivado de `seed`, e os eventos de mercado são
+    registrados em `event_log` e sorteados por bloco: ao materializar um bloco novo, os eventos passados
+    são reaplicados a ele de forma determinística, com o mesmo resultado que teria se já existisse.
+    """
+    def __init__(self, idh_bairros, size, seed, engine, chunk_size=10000):
+        self.table        = BairroTable(idh_bairros)
+        self.bairros      = self.table.names
+        self.size         = size
+        self.seed         = seed
+        self.chunk_size   = chunk_size
+        self.engine       = engine  # MarketEventEngine usado para reaplicar o `event_log`
+        self.extras       = {}
+        self.event_log    = []  # Índices dos eventos aplicados, em ordem
+        self.clock        = 0  # Passos envelhecidos: tempo_no_mercado de um imóvel nunca negociado
+        self.decay_factor = 1.0  # Desgaste acumulado de um imóvel nunca negociado
+        self.materialized = 0
+        self._buffers     = {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_DTYPES.items()}
+        self._shared      = False
+        self._expose()
+        self.ensure(0)
+
+    def __len__(self):
+        return self.size
+
+    def _rng(self, *key):
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=key))
+
+    def _expose(self):
+        for name, buffer in self._buffers.items():
+            setattr(self, name, buffer[:self.materialized])
+
+    def _chunk(self, c):
+        """Colunas (visões) do bloco `c`, na forma de um Market para o motor de eventos."""
+        rows = slice(c * self.chunk_size, min((c + 1) * self.chunk_size, self.materialized))
+        return Market({name: buffer[rows] for name, buffer in self._buffers.items()}, self.table)
+
+    def ensure(self, index):
+        """Materializa os blocos até cobrir o imóvel `index`, reaplicando os eventos já ocorridos."""
+        if index < self.materialized or self.materialized >= self.size:
+            return
+        target = min(self.size, (index // self.chunk_size + 1) * self.chunk_size)
+        if target > len(self._buffers["preco"]):
+            capacity = min(self.size, max(target, 2 * len(self._buffers["preco"])))
+            for name, buffer in self._buffers.items():
+                grown = np.empty(capacity, dtype=buffer.dtype)
+                grown[:self.materialized] = buffer[:self.materialized]
+                self._buffers[name] = grown
+            self._shared = False  # Buffers novos: nenhum snapshot os referencia
+        else:
+            self.own()
+        while self.materialized < target:
+            c = self.materialized // self.chunk_size
+            count = min(self.chunk_size, self.size - self.materialized)
+            columns = generate_columns(self.table, count, self._rng(0, c))
+            for name, column in columns.items():
+                self._buffers[name][self.materialized:self.materialized + count] = column
+            self.materialized += count
+            chunk = self._chunk(c)
+            for j, event in enumerate(self.event_log):
+                self.engine.apply(chunk, event, self._rng(1, j, c))
+            # Os choques são multiplicativos e as máscaras não dependem do preço: a ordem não importa
+            chunk.tempo_no_mercado[:] = self.clock
+            chunk.preco *= self.decay_factor
+        self._expose()
+
+    def snapshot(self):
+        self._shared = True
+        return {
+            "buffers": dict(self._buffers),
+            "materialized": self.materialized,
+            "event_log": tuple(self.event_log),
+            "clock": self.clock,
+            "decay_factor": self.decay_factor,
+        }
+
+    def restore(self, snapshot):
+        self._buffers = dict(snapshot["buffers"])
+        self.materialized = snapshot["materialized"]
+        self.event_log = list(snapshot["event_log"])
+        self.clock = snapshot["clock"]
+        self.decay_factor = snapshot["decay_factor"]
+        self._shared = True
+        self._expose()
+
+    def own(self):
+        if self._shared:
+            self._buffers = {name: buffer.copy() for name, buffer in self._buffers.items()}
+            self._shared = False
+            self._expose()
+
+    def age(self, elapsed, stale_after=30, decay=0.0, rows=None):
+        """Envelhece o prefixo materializado; o desgaste dos blocos futuros fica em `clock`/`decay_factor`."""
+        self.clock += elapsed
+        if decay and elapsed > 0 and self.clock > stale_after:
+            self.decay_factor *= (1 - decay) ** elapsed
+        return super().age(elapsed, stale_after, decay)
+
+    def apply_event(self, engine, event, rng=None):
+        """Registra o evento e o aplica bloco a bloco aos imóveis já materializados.
+        Os choques vêm do fluxo do bloco (não de `rng`), para que a reaplicação seja determinística."""
+        self.own()
+        j = len(self.event_log)
+        self.event_log.append(event)
+        indices, factors = [], []
+        for c in range(-(-self.materialized // self.chunk_size)):
+            idx, fac = engine.apply(self._chunk(c), event, self._rng(1, j, c))
+            if fac is None:
+                return None, None
+            indices.append(np.arange(fac.size) if idx is None else idx)
+            indices[-1] = indices[-1] + c * self.chunk_size
+            factors.append(fac)
+        if not factors:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        return np.concatenate(indices), np.concatenate(factors)
+
+###################################################################################################################
+class PropertyView(MutableMapping):
+    """Visão de um imóvel do mercado colunar com a mesma interface do antigo dicionário."""
+    __slots__ = ("market", "index")
+
+    def __init__(self, market, index):
+        self.market = market
+        self.index = index
+
+    def __getitem__(self, key):
+        column = PROPERTY_KEYS.get(key)
+        if column is None:
+            return self.market.extras.get(self.index, {})[key]
+        value = self.market.take(column, self.index)
+        if column == "tipo":
+            return TIPOS_IMOVEL[value]
+        if column == "bairro":
+            return self.market.bairros[value]
+        return value.item()
+
+    def __setitem__(self, key, value):
+        column = PROPERTY_KEYS.get(key)
+        if column is None:
+            self.market.extras.setdefault(self.index, {})[key] = value
+        elif column in BAIRRO_COLUMNS:
+            raise KeyError(f"atributo do bairro não pode ser alterado por imóvel: {key}")
+        elif column == "tipo":
+            self.market.tipo[self.index] = TIPOS_IMOVEL.index(value)
+        elif column == "bairro":
+            self.market.bairro[self.index] = self.market.bairros.index(value)
+        else:
+            if column in MUTABLE_COLUMNS:
+                self.market.own()  # Não escreve em colunas ainda compartilhadas com um snapshot
+            getattr(self.market, column)[self.index] = value
+
+    def __delitem__(self, key):
+        if key in PROPERTY_KEYS:
+            raise KeyError(f"coluna do mercado não pode ser removida: {key}")
+        del self.market.extras.get(self.index, {})[key]
+
+    def __iter__(self):
+        yield from PROPERTY_KEYS
+        yield from self.market.extras.get(self.index, {})
+
+    def __len__(self):
+        return len(PROPERTY_KEYS) + len(self.market.extras.get(self.index, {}))
+
+    def __eq__(self, other):
+        if isinstance(other, PropertyView):
+            return self.market is other.market and self.index == other.index
+        return super().__eq__(other)
+
+    def __hash__(self):
+        return hash((id(self.market), self.index))
+
+    def __repr__(self):
+        return f"PropertyView({self.index}, {dict(self)})"
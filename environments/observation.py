@@ -0,0 +1,162 @@
+import numpy as np
+from gymnasium import spaces
+
+###################################################################################################################
+# Características de cada anúncio na janela de listagem: (coluna, fator de normalização)
+WINDOW_FEATURES = (
+    ("preco", 1 / 5000000),
+    ("metragem", 1 / 500),
+    ("condominio", 1 / 5000),
+    ("tipo", 1 / 3),
+    ("idh", 1.0),
+    ("crime", 1.0),
+    ("infra", 1.0),
+    ("demanda", 1 / 1000),
+    ("tempo_no_mercado", 1 / 100),
+)
+
+# Características de cada posição da carteira no bloco "holdings"
+HOLDING_FEATURES = ("ocupada", "preco", "ganho", "tempo_no_mercado")
+
+# Configurações prontas para `make_observation`
+PRESETS = {
+    # Observação original: [preço, demanda, IDH, criminalidade, infraestrutura, saldo]
+    "basic": {"listing": True},
+    "rich": {"listing": True, "window": 16, "portfolio": True, "bairros": True, "events": 8},
+}
+
+###################################################################################################################
+class ObservationBuilder:
+    """
+    Monta a observação do ambiente a partir de blocos configuráveis, lidos das colunas do mercado
+    com gathers vetorizados e escritos em um buffer pré-alocado (o mesmo array é devolvido a
+    cada passo: copie-o se precisar guardar observações antigas).
+
+    Blocos, na ordem do vetor:
+    - listing:   imóvel atual [preço, demanda, IDH, criminalidade, infraestrutura, saldo]
+    - window:    K próximos anúncios a partir do passo atual, cada um com WINDOW_FEATURES
+    - portfolio: [nº de imóveis, valor da carteira, saldo, patrimônio, contador de espera, ganho não realizado]
+    - holdings:  P primeiras posições de `env.portfolio.indices()`, cada uma com HOLDING_FEATURES
+                 (as posições endereçadas pela venda por posição do modo "multi")
+    - bairros:   por bairro [preço médio/m², estoque relativo, demanda média, variação recente] (do `env.bairro_index`)
+    - events:    histórico dos H últimos eventos de mercado (one-hot por tipo de evento)
+    """
+    def __init__(self, num_bairros, num_event_types, listing=True, window=0, portfolio=False, holdings=0, bairros=False, events=0):
+        self.listing         = listing
+        self.window          = window
+        self.portfolio       = portfolio
+        self.holdings        = holdings
+        self.bairros         = bairros
+        self.events          = events
+        self.num_bairros     = num_bairros
+        self.num_event_types = num_event_types
+
+        sizes = [
+            ("listing", 6 if listing else 0),
+            ("window", window * len(WINDOW_FEATURES)),
+            ("portfolio", 6 if portfolio else 0),
+            ("holdings", holdings * len(HOLDING_FEATURES)),
+            ("bairros", 4 * num_bairros if bairros else 0),
+            ("events", events * num_event_types),
+        ]
+        self.slices, start = {}, 0
+        for name, size in sizes:
+            self.slices[name] = slice(start, start + size)
+            start += size
+        self.buffer = np.zeros(start, dtype=np.float32)
+        self._offsets = np.arange(window)
+        self._bairro_stats = np.empty((num_bairros, 4))
+
+        if sizes[0][1] == start:
+            self.space = spaces.Box(low=0, high=1, shape=(start,), dtype=np.float32)
+        else:
+            self.space = spaces.Box(low=-np.inf, high=np.inf, shape=(start,), dtype=np.float32)
+
+    def build(self, env):
+        """Preenche o buffer com a observação atual do ambiente e o devolve."""
+        market, step = env.market, env.current_step
+        if step >= len(market):
+            self.buffer[:] = 0
+            return self.buffer
+        market.ensure(step)  # Mercado preguiçoso: materializa o bloco do passo atual
+        if self.listing:
+            self._fill_listing(env, market, step, self.buffer[self.slices["listing"]])
+        if self.window:
+            self._fill_window(market, step, self.buffer[self.slices["window"]].reshape(self.window, -1))
+        if self.portfolio:
+            self._fill_portfolio(env, self.buffer[self.slices["portfolio"]])
+        if self.holdings:
+            self._fill_holdings(env, market, self.buffer[self.slices["holdings"]].reshape(self.holdings, -1))
+        if self.bairros:
+            self._fill_bairros(env, market, self.buffer[self.slices["bairros"]].reshape(self.num_bairros, -1))
+        if self.events:
+            self._fill_events(env, self.buffer[self.slices["events"]].reshape(self.events, -1))
+        return self.buffer
+
+###################################################################################################################
+    def _fill_listing(self, env, market, step, out):
+        out[0] = market.preco[step] / 5000000  # Normaliza para [0, 1]
+        out[1] = market.demanda[step] / 1000
+        code = market.bairro[step]
+        out[2] = market.table.idh[code]
+        out[3] = market.table.crime[code]
+        out[4] = market.table.infra[code]
+        out[5] = env.cash / 1000000  # Saldo normalizado [0, 1]
+
+    def _fill_window(self, market, step, out):
+        market.ensure(min(step + self.window, len(market)) - 1)
+        idx = step + self._offsets
+        valid = idx < len(market)
+        idx = np.minimum(idx, len(market) - 1)
+        for j, (column, scale) in enumerate(WINDOW_FEATURES):
+            out[:, j] = market.take(column, idx) * scale
+        out[~valid] = 0
+
+    def _fill_portfolio(self, env, out):
+        value = env.portfolio.value
+        cost = env.portfolio.buy_prices().sum()
+        out[0] = len(env.portfolio) / 100
+        out[1] = value / 1000000
+        out[2] = env.cash / 1000000
+        out[3] = (env.cash + value) / 1000000
+        out[4] = env.waiting_steps / 20
+        out[5] = (value - cost) / cost if cost > 0 else 0.0
+
+    def _fill_holdings(self, env, market, out):
+        out[:] = 0
+        indices = env.portfolio.indices()[:self.holdings]
+        count = len(indices)
+        if count:
+            preco = market.preco[indices]
+            paid = env.portfolio.buy_prices()[:count]
+            out[:count, 0] = 1
+            out[:count, 1] = preco / 5000000
+            out[:count, 2] = (preco - paid) / paid
+            out[:count, 3] = market.tempo_no_mercado[indices] / 100
+
+    def _fill_bairros(self, env, market, out):
+        env.bairro_index.sync(market)
+        stats = env.bairro_index.aggregates(self._bairro_stats)
+        out[:, 0] = stats[:, 0] / 15000
+        out[:, 1] = stats[:, 1] * self.num_bairros / max(env.bairro_index.covered, 1)  # 1 = estoque médio por bairro
+        out[:, 2] = stats[:, 2] / 1000
+        out[:, 3] = stats[:, 3]
+
+    def _fill_events(self, env, out):
+        out[:] = 0
+        recent = env.recent_events
+        for row in range(min(self.events, len(recent))):
+            event = recent[-1 - row]  # Do mais recente ao mais antigo, sem copiar a deque
+            if event < self.num_event_types:
+                out[row, event] = 1
+
+###################################################################################################################
+def make_observation(config, num_bairros, num_event_types):
+    """Cria um ObservationBuilder a partir de um preset ("basic", "rich") ou de um dicionário de blocos."""
+    if config is None:
+        config = "basic"
+    if isinstance(config, str):
+        if config not in PRESETS:
+            raise ValueError(f"observação desconhecida: {config!r} (use um de {sorted(PRESETS)} ou um dicionário)")
+        config = PRESETS[config]
+    return ObservationBuilder(num_bairros, num_event_types, **config)
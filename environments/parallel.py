@@ -0,0 +1,174 @@
+import multiprocessing as mp
+import traceback
+from multiprocessing import shared_memory
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from .market import COLUMN_DTYPES, IDH_BAIRROS, Market
+from .seeding import spawn_seeds
+from .vector import VectorHomeChoiceEnv
+
+###################################################################################################################
+def _attach(spec):
+    """Abre um bloco de memória compartilhada descrito por (nome, formato, dtype) como array NumPy."""
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _worker(conn, specs, rows, market_size, idh_bairros, seed, stale_after, stale_decay):
+    """Processo trabalhador: roda um VectorHomeChoiceEnv sobre as linhas `rows` dos buffers compartilhados."""
+    blocks, arrays, market, env = [], {}, None, None
+    try:
+        for key, spec in specs.items():
+            shm, arrays[key] = _attach(spec)
+            blocks.append(shm)
+        market = Market({name: arrays[name][rows] for name in COLUMN_DTYPES}, idh_bairros)
+        env = VectorHomeChoiceEnv(rows.stop - rows.start, market_size, idh_bairros, market=market, seed=seed,
+                                  stale_after=stale_after, stale_decay=stale_decay)
+
+        while True:
+            cmd, data = conn.recv()
+            if cmd == "step":
+                obs, rewards, terminated, _, infos = env.step(arrays["actions"][rows])
+                arrays["rewards"][rows] = rewards
+                arrays["terminated"][rows] = terminated
+                if terminated.any():
+                    arrays["final_obs"][rows][terminated] = np.stack(infos["final_obs"][terminated])
+            elif cmd == "reset":
+                obs, _ = env.reset(seed=data)
+            elif cmd == "close":
+                conn.send(("ok", None))
+                break
+            else:
+                raise ValueError(f"comando desconhecido: {cmd}")
+            arrays["obs"][rows] = obs
+            conn.send(("ok", None))
+    except Exception:
+        conn.send(("error", traceback.format_exc()))
+    finally:
+        # Solta as visões dos buffers antes de fechar a memória compartilhada
+        arrays.clear()
+        market = env = None
+        for shm in blocks:
+            shm.close()
+        conn.close()
+
+###################################################################################################################
+class ParallelVectorHomeChoiceEnv(VectorEnv):
+    """
+    VectorHomeChoiceEnv distribuído em subprocessos: N = num_workers * envs_per_worker ambientes,
+    cada trabalhador avançando seu grupo com um VectorHomeChoiceEnv.
+    As colunas do mercado, observações, recompensas e ações ficam em blocos de
+    `multiprocessing.shared_memory` pré-alocados; o pipe de cada trabalhador só
+    transporta comandos curtos, nunca dados.
+
+    Herda as limitações do VectorHomeChoiceEnv em relação ao HomeChoiceEnv: só a observação
+    "basic" (6 valores) e ações Discrete(3), sem modo "multi", sem mercado preguiçoso e sem MarketCache.
+    """
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_workers=None, envs_per_worker=1, market_size=100000, idh_bairros=None, seed=None, context=None,
+                 stale_after=30, stale_decay=0.0):
+        self.num_workers              = num_workers or mp.cpu_count()
+        self.envs_per_worker          = envs_per_worker
+        self.num_envs                 = self.num_workers * envs_per_worker
+        self.market_size              = market_size
+        self.idh_bairros              = dict(idh_bairros if idh_bairros is not None else IDH_BAIRROS)
+        self.stale_after              = stale_after  # Desgaste de mercado, repassado a cada trabalhador
+        self.stale_decay              = stale_decay
+        self.single_action_space      = spaces.Discrete(3)  # 0 = Comprar, 1 = Esperar, 2 = Vender
+        self.single_observation_space = spaces.Box(low=0, high=1, shape=(6,), dtype=np.float32)
+        self.action_space             = batch_space(self.single_action_space, self.num_envs)
+        self.observation_space        = batch_space(self.single_observation_space, self.num_envs)
+        self.closed                   = False
+
+        # Buffers compartilhados: colunas (N, M) do mercado e dados de cada passo
+        layout = {name: ((self.num_envs, market_size), dtype) for name, dtype in COLUMN_DTYPES.items()}
+        layout.update({
+            "obs":        ((self.num_envs, 6), np.float32),
+            "final_obs":  ((self.num_envs, 6), np.float32),
+            "rewards":    ((self.num_envs,), np.float64),
+            "terminated": ((self.num_envs,), np.bool_),
+            "actions":    ((self.num_envs,), np.int64),
+        })
+        self._blocks, self._arrays, specs = [], {}, {}
+        for key, (shape, dtype) in layout.items():
+            nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            self._blocks.append(shm)
+            self._arrays[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+            specs[key] = (shm.name, shape, dtype)
+        self.market = Market({name: self._arrays[name] for name in COLUMN_DTYPES}, self.idh_bairros)
+
+        ctx = mp.get_context(context)
+        seeds = spawn_seeds(seed, self.num_workers)
+        self._conns, self._processes = [], []
+        for w in range(self.num_workers):
+            rows = slice(w * envs_per_worker, (w + 1) * envs_per_worker)
+            parent, child = ctx.Pipe()
+            args = (child, specs, rows, market_size, self.idh_bairros, seeds[w], stale_after, stale_decay)
+            process = ctx.Process(target=_worker, args=args, daemon=True)
+            process.start()
+            child.close()
+            self._conns.append(parent)
+            self._processes.append(process)
+
+###################################################################################################################
+    def _broadcast(self, cmd, data=None):
+        """Envia um comando a todos os trabalhadores (com `data` comum ou uma lista por trabalhador) e espera as confirmações."""
+        payloads = data if isinstance(data, list) else [data] * self.num_workers
+        for conn, payload in zip(self._conns, payloads):
+            conn.send((cmd, payload))
+        errors = []
+        for w, conn in enumerate(self._conns):
+            status, payload = conn.recv()
+            if status == "error":
+                errors.append(f"trabalhador {w}:\n{payload}")
+        if errors:
+            raise RuntimeError("\n".join(errors))
+
+    def get_market(self, i):
+        """Mercado do sub-ambiente i, lido diretamente da memória compartilhada."""
+        return Market({name: column[i] for name, column in self.market.columns().items()}, self.market.table)
+
+    def reset(self, seed=None, options=None):
+        """Reseta todos os sub-ambientes. Retorna (observações, infos)."""
+        self._broadcast("reset", None if seed is None else spawn_seeds(seed, self.num_workers))
+        return self._arrays["obs"].copy(), {}
+
+    def step(self, actions):
+        """Avança todos os sub-ambientes. Retorna (observações, recompensas, terminações, truncamentos, infos)."""
+        self._arrays["actions"][:] = actions
+        self._broadcast("step")
+        terminated = self._arrays["terminated"].copy()
+        infos = {}
+        if terminated.any():
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            for i in np.flatnonzero(terminated):
+                final_obs[i] = self._arrays["final_obs"][i].copy()
+            infos["final_obs"], infos["_final_obs"] = final_obs, terminated
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        return self._arrays["obs"].copy(), self._arrays["rewards"].copy(), terminated, truncated, infos
+
+    def close_extras(self, **kwargs):
+        """Encerra os trabalhadores e libera a memória compartilhada."""
+        for conn, process in zip(self._conns, self._processes):
+            if process.is_alive():
+                try:
+                    conn.send(("close", None))
+                    conn.recv()
+                except (BrokenPipeError, EOFError):
+                    pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+            conn.close()
+        self.market, self._arrays = None, {}
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+
+###################################################################################################################
+# Fases cronometradas de um passo do ambiente
+PHASES = (
+    "action",       # Compra/venda/espera e cálculo da recompensa
+    "market",       # Envelhecimento do mercado e eventos (_age_market + _apply_market_events)
+    "observation",  # _get_observation
+    "record",       # TrajectoryRecorder.record
+    "render",       # render / render_grafs (chamados fora do step)
+)
+
+# Contadores de decisões do agente
+COUNTERS = (
+    "steps",
+    "buys",
+    "sells",
+    "forced_buys",  # Compras forçadas por waiting_steps >= 20 (mesmo sem saldo para concluir)
+)
+
+###################################################################################################################
+class PerfStats:
+    """
+    Cronômetros por fase e contadores do ambiente, acumulados em arrays pré-alocados.
+    Os tempos vêm de `time.perf_counter` (monotônico); `step_times` guarda a duração de cada fase
+    no último passo e `times`/`calls` os totais desde o último `clear()`.
+    Só existe com `profile=True` no ambiente: desligado, o custo por passo é um teste de `None`.
+    """
+    clock = staticmethod(time.perf_counter)
+
+    def __init__(self, event_names):
+        self.event_names = tuple(event_names)
+        self.times       = np.zeros(len(PHASES), dtype=np.float64)  # Segundos acumulados por fase
+        self.calls       = np.zeros(len(PHASES), dtype=np.int64)
+        self.step_times  = np.zeros(len(PHASES), dtype=np.float64)  # Segundos por fase no último passo
+        self.counters    = np.zeros(len(COUNTERS), dtype=np.int64)
+        self.events      = np.zeros(len(self.event_names), dtype=np.int64)  # Eventos disparados por tipo
+
+    def count_event(self, event, events):
+        """Conta um disparo do evento de índice `event` de `events` (a lista do MarketEventEngine).
+        O contador cresce quando eventos são registrados depois da criação do ambiente."""
+        if event >= len(self.events):
+            grown = np.zeros(len(events), dtype=np.int64)
+            grown[:len(self.events)] = self.events
+            self.events = grown
+            self.event_names = tuple(ev.name for ev in events)
+        self.events[event] += 1
+
+    def add(self, phase, elapsed):
+        """Soma `elapsed` segundos à fase de índice `phase` (posição em PHASES)."""
+        self.times[phase] += elapsed
+        self.calls[phase] += 1
+        self.step_times[phase] = elapsed
+
+    def clear(self):
+        self.times[:] = 0
+        self.calls[:] = 0
+        self.step_times[:] = 0
+        self.counters[:] = 0
+        self.events[:] = 0
+
+    def as_dict(self):
+        """Resumo legível: totais e médias por fase (em segundos), contadores e eventos por nome."""
+        calls = np.maximum(self.calls, 1)
+        stats = {
+            "time": dict(zip(PHASES, self.times.tolist())),
+            "calls": dict(zip(PHASES, self.calls.tolist())),
+            "mean": dict(zip(PHASES, (self.times / calls).tolist())),
+            "events": dict(zip(self.event_names, self.events.tolist())),
+        }
+        stats.update(zip(COUNTERS, self.counters.tolist()))
+        return stats
+
+
+# Índices usados no laço quente (evita buscas por nome)
+ACTION, MARKET, OBSERVATION, RECORD, RENDER = range(len(PHASES))
+STEPS, BUYS, SELLS, FORCED_BUYS = range(len(COUNTERS))
@@ -0,0 +1,206 @@
+import copy
+import heapq
+
+import numpy as np
+
+###################################################################################################################
+def push_owned(indices, buy_prices, head, tail, index, price):
+    """Anexa (index, price) à fila [head, tail) dos buffers. Retorna (indices, buy_prices, head, tail).
+    Os buffers têm tamanho fixo e são escritos no lugar; só quando a fila chega ao fim eles são
+    trocados por buffers compactados (ou com o dobro da capacidade, se ainda estiverem cheios)."""
+    if tail == len(indices):
+        count = tail - head
+        capacity = len(indices) if count < len(indices) // 2 else 2 * len(indices)
+        new_indices = np.zeros(capacity, dtype=indices.dtype)
+        new_prices  = np.zeros(capacity, dtype=buy_prices.dtype)
+        new_indices[:count] = indices[head:tail]
+        new_prices[:count]  = buy_prices[head:tail]
+        indices, buy_prices, head, tail = new_indices, new_prices, 0, count
+    indices[tail] = index
+    buy_prices[tail] = price
+    return indices, buy_prices, head, tail + 1
+
+
+def pop_owned(indices, head, tail):
+    """Remove o mais antigo da fila [head, tail). Retorna (índice no mercado, head, tail); a fila vazia volta a 0."""
+    index = int(indices[head])
+    head += 1
+    if head == tail:
+        head = tail = 0
+    return index, head, tail
+
+###################################################################################################################
+class Portfolio:
+    """
+    Carteira do agente guardada como índices no mercado colunar (fila: vende-se o mais antigo).
+    Mantém o valor de mercado total (`value`) em execução: é ajustado a cada compra/venda
+    e recalculado com um único gather quando eventos mudam os preços, então consultar
+    o patrimônio custa O(1).
+    """
+    def __init__(self, capacity=64):
+        self._indices    = np.zeros(capacity, dtype=np.int64)
+        self._buy_prices = np.zeros(capacity, dtype=np.float64)
+        self._head       = 0
+        self._tail       = 0
+        self.value       = 0.0  # Soma dos preços de mercado atuais dos imóveis da carteira
+
+    def __len__(self):
+        return self._tail - self._head
+
+    def indices(self):
+        """Índices no mercado dos imóveis da carteira, do mais antigo ao mais recente (visão, não cópia)."""
+        return self._indices[self._head:self._tail]
+
+    def buy_prices(self):
+        """Preços pagos por cada imóvel, na mesma ordem de `indices()`."""
+        return self._buy_prices[self._head:self._tail]
+
+    def buy(self, index, price):
+        """Adiciona o imóvel `index` comprado por `price`."""
+        self._indices, self._buy_prices, self._head, self._tail = push_owned(
+            self._indices, self._buy_prices, self._head, self._tail, index, price)
+        self.value += price
+
+    def sell_oldest(self, preco):
+        """Remove o imóvel mais antigo e retorna seu índice no mercado. `preco` é a coluna de preços atual."""
+        index, self._head, self._tail = pop_owned(self._indices, self._head, self._tail)
+        self.value = self.value - preco[index] if self._tail > self._head else 0.0
+        return index
+
+    def queue(self):
+        """Fila da carteira como (índices, preços pagos, início, fim, valor): os buffers, sem cópia
+        (formato dos campos `owned`, `paid`, `head`, `tail` e `value` do `core.CoreState`)."""
+        return self._indices, self._buy_prices, self._head, self._tail, self.value
+
+    def load_queue(self, indices, buy_prices, head, tail, value):
+        """Adota a fila devolvida pelo núcleo funcional (ver `queue`)."""
+        self._indices, self._buy_prices, self._head, self._tail, self.value = indices, buy_prices, head, tail, value
+
+    def revalue(self, preco):
+        """Recalcula o valor de mercado da carteira após mudanças de preço (um gather vetorizado)."""
+        self.value = float(preco[self.indices()].sum())
+        return self.value
+
+    def clear(self):
+        self._head = self._tail = 0
+        self.value = 0.0
+
+    def copy(self):
+        """Cópia independente (usada nos snapshots do ambiente)."""
+        new = copy.copy(self)
+        new._indices, new._buy_prices = self._indices.copy(), self._buy_prices.copy()
+        return new
+
+###################################################################################################################
+class Holdings:
+    """
+    Carteira indexada para o modo de ações multiativos: compra de qualquer anúncio e venda de um imóvel específico.
+    - arrays densos (`indices()`, `buy_prices()`) com remoção por troca com o último: venda por id em O(1)
+    - dicionário id -> posição/versão: consulta de posse em O(1)
+    - heap de ganho não realizado (preço atual - preço pago), com remoção preguiçosa: compra e
+      consulta/venda do melhor ganho em O(log n). O heap é refeito em O(n) só quando eventos mudam preços.
+    Mantém a mesma interface da `Portfolio` usada pela observação, renderização e avaliação.
+    """
+    def __init__(self, capacity=64):
+        self._indices    = np.zeros(capacity, dtype=np.int64)
+        self._buy_prices = np.zeros(capacity, dtype=np.float64)
+        self._count      = 0
+        self._slot       = {}  # Índice no mercado -> (posição nos arrays, versão da entrada no heap)
+        self._heap       = []  # (-ganho, versão, índice no mercado)
+        self._version    = 0
+        self.value       = 0.0  # Soma dos preços de mercado atuais dos imóveis da carteira
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, index):
+        return index in self._slot
+
+    def indices(self):
+        """Índices no mercado dos imóveis da carteira (visão, sem ordem definida)."""
+        return self._indices[:self._count]
+
+    def buy_prices(self):
+        """Preços pagos por cada imóvel, na mesma ordem de `indices()`."""
+        return self._buy_prices[:self._count]
+
+    def buy(self, index, price):
+        """Adiciona o imóvel `index` comprado por `price` (ganho inicial zero)."""
+        if self._count == len(self._indices):
+            self._grow()
+        pos = self._count
+        self._indices[pos] = index
+        self._buy_prices[pos] = price
+        self._count += 1
+        self._version += 1
+        self._slot[index] = (pos, self._version)
+        heapq.heappush(self._heap, (-0.0, self._version, index))
+        self.value += price
+
+    def sell(self, index, preco):
+        """Remove o imóvel `index` da carteira. `preco` é a coluna de preços atual."""
+        pos, _ = self._slot.pop(index)
+        last = self._count - 1
+        if pos != last:
+            moved = int(self._indices[last])
+            self._indices[pos] = moved
+            self._buy_prices[pos] = self._buy_prices[last]
+            self._slot[moved] = (pos, self._slot[moved][1])
+        self._count = last
+        self.value -= preco[index]
+        if self._count == 0:
+            self.clear()
+        elif len(self._heap) > 2 * self._count + 64:
+            self._rebuild(preco)  # Limita o lixo deixado pela remoção preguiçosa
+        return index
+
+    def best(self, rank=0):
+        """Imóvel com o `rank`-ésimo maior ganho não realizado (0 = melhor), ou None. Custa O((rank + 1) log n)."""
+        popped, found = [], None
+        while self._heap and len(popped) <= rank:
+            entry = heapq.heappop(self._heap)
+            if self._slot.get(entry[2], (None, None))[1] == entry[1]:
+                popped.append(entry)
+        if len(popped) > rank:
+            found = popped[rank][2]
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return found
+
+    def sell_ranked(self, rank, preco):
+        """Vende o imóvel de `rank`-ésimo maior ganho (ou o de menor ganho, se houver menos imóveis)."""
+        index = self.best(min(rank, self._count - 1))
+        return self.sell(index, preco)
+
+    def revalue(self, preco):
+        """Recalcula o valor da carteira e o heap de ganhos após mudanças de preço (vetorizado + heapify)."""
+        self.value = float(preco[self.indices()].sum())
+        self._rebuild(preco)
+        return self.value
+
+    def _rebuild(self, preco):
+        indices = self.indices()
+        gains = preco[indices] - self.buy_prices()
+        versions = [self._slot[i][1] for i in indices.tolist()]
+        self._heap = list(zip((-gains).tolist(), versions, indices.tolist()))
+        heapq.heapify(self._heap)
+
+    def clear(self):
+        self._count = 0
+        self._slot.clear()
+        self._heap.clear()
+        self.value = 0.0
+
+    def copy(self):
+        """Cópia independente (usada nos snapshots do ambiente)."""
+        new = copy.copy(self)
+        new._indices, new._buy_prices = self._indices.copy(), self._buy_prices.copy()
+        new._slot, new._heap = dict(self._slot), list(self._heap)
+        return new
+
+    def _grow(self):
+        for name in ("_indices", "_buy_prices"):
+            old = getattr(self, name)
+            new = np.zeros(2 * len(old), dtype=old.dtype)
+            new[:self._count] = old[:self._count]
+            setattr(self, name, new)
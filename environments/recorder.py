@@ -0,0 +1,115 @@
+import json
+import os
+import shutil
+import tempfile
+import weakref
+
+import numpy as np
+
+###################################################################################################################
+# Colunas da trajetória e seus tipos NumPy
+TRAJECTORY_DTYPES = {
+    "step": np.int64,
+    "action": np.int8,
+    "reward": np.float64,
+    "cash": np.float64,
+    "value": np.float64,     # Valor de mercado da carteira
+    "holdings": np.int32,    # Número de imóveis na carteira
+    "waiting": np.int32,     # Contador de espera
+    "event": np.int8,        # Índice do evento de mercado aplicado no passo (-1 = nenhum)
+}
+
+SCHEMA_FILE = "schema.json"
+
+###################################################################################################################
+class TrajectoryRecorder:
+    """
+    Gravador de trajetórias em streaming com memória fixa.
+    Cada passo é escrito em um buffer circular de `capacity` linhas por coluna; quando o buffer
+    enche, o bloco é anexado ao arquivo binário da coluna (`<coluna>.bin` em `path`, formato
+    colunar append-only descrito em `schema.json`). Nada cresce em memória com o episódio.
+    """
+    def __init__(self, path, capacity=4096):
+        self.path     = path
+        self.capacity = capacity
+        self.buffers  = {name: np.zeros(capacity, dtype=dtype) for name, dtype in TRAJECTORY_DTYPES.items()}
+        self.count    = 0  # Linhas no buffer ainda não gravadas
+        self.flushed  = 0  # Linhas já gravadas em disco
+        self.temporary = False  # Diretório criado por `temporary()`, apagado em `close()` ou na coleta do gravador
+        self._cleanup  = None
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, SCHEMA_FILE), "w", encoding="utf-8") as f:
+            json.dump({"columns": {name: np.dtype(dtype).str for name, dtype in TRAJECTORY_DTYPES.items()}}, f)
+        for name in TRAJECTORY_DTYPES:
+            open(self._file(name), "wb").close()
+
+    @classmethod
+    def temporary(cls, capacity=4096, prefix="homechoice-"):
+        """Gravador em um diretório temporário novo, removido junto com os arquivos por `close()`
+        ou, se `close()` nunca for chamado, quando o gravador for coletado (ou no fim do processo)."""
+        recorder = cls(tempfile.mkdtemp(prefix=prefix), capacity)
+        recorder.temporary = True
+        recorder._cleanup = weakref.finalize(recorder, shutil.rmtree, recorder.path, True)
+        return recorder
+
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def __len__(self):
+        return self.flushed + self.count
+
+    def record(self, step, action, reward, cash, value, holdings, waiting, event=-1):
+        """Adiciona um passo à trajetória."""
+        row = self.count
+        buffers = self.buffers
+        buffers["step"][row]     = step
+        buffers["action"][row]   = action
+        buffers["reward"][row]   = reward
+        buffers["cash"][row]     = cash
+        buffers["value"][row]    = value
+        buffers["holdings"][row] = holdings
+        buffers["waiting"][row]  = waiting
+        buffers["event"][row]    = event
+        self.count += 1
+        if self.count == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """Anexa as linhas do buffer aos arquivos das colunas."""
+        if self.count == 0:
+            return
+        for name, buffer in self.buffers.items():
+            with open(self._file(name), "ab") as f:
+                buffer[:self.count].tofile(f)
+        self.flushed += self.count
+        self.count = 0
+
+    def read(self, start=0):
+        """Colunas a partir da linha `start`: o que já está em disco seguido do buffer ainda não gravado."""
+        columns = read_trajectory(self.path, start) if start < self.flushed else None
+        offset = max(start - self.flushed, 0)
+        pending = {name: buffer[offset:self.count] for name, buffer in self.buffers.items()}
+        if columns is None:
+            return {name: column.copy() for name, column in pending.items()}
+        return {name: np.concatenate([columns[name], pending[name]]) for name in TRAJECTORY_DTYPES}
+
+    def close(self):
+        self.flush()
+        if self._cleanup is not None:
+            self._cleanup()  # Apaga o diretório temporário (uma única vez)
+
+###################################################################################################################
+def read_trajectory(path, start=0, stop=None):
+    """Lê as linhas [start, stop) de uma trajetória gravada, sem carregar o arquivo inteiro."""
+    with open(os.path.join(path, SCHEMA_FILE), encoding="utf-8") as f:
+        dtypes = {name: np.dtype(dtype) for name, dtype in json.load(f)["columns"].items()}
+    columns = {}
+    for name, dtype in dtypes.items():
+        file = os.path.join(path, f"{name}.bin")
+        rows = os.path.getsize(file) // dtype.itemsize
+        end = rows if stop is None else min(stop, rows)
+        count = max(end - start, 0)
+        columns[name] = np.fromfile(file, dtype=dtype, count=count, offset=start * dtype.itemsize)
+    # Um leitor concorrente pode ver colunas com tamanhos diferentes durante um flush
+    size = min(len(column) for column in columns.values())
+    return {name: column[:size] for name, column in columns.items()}
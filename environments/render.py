@@ -0,0 +1,194 @@
+import numpy as np
+
+from .geometry import DistrictMap
+
+###################################################################################################################
+# Cores
+COLOR_BG        = (240, 240, 240)
+COLOR_DISTRICT  = (210, 210, 210)
+COLOR_OUTLINE   = (0, 0, 0)
+COLOR_TEXT      = (0, 0, 0)
+COLOR_AVAILABLE = (100, 149, 237)   # Azul
+COLOR_ANALYZED  = (255, 215, 0)     # Amarelo
+COLOR_BOUGHT    = (60, 179, 113)    # Verde
+COLOR_SOLD      = (220, 20, 60)     # Vermelho
+
+ICON_RADIUS = 5
+
+# Área do mapa onde os imóveis são posicionados: (x, y, largura, altura)
+MAP_AREA = (300, 100, 450, 400)
+
+
+def load_distritos():
+    """Polígonos dos distritos exportados por `GEO/transform/get_SP.py` (None se o arquivo não foi gerado)."""
+    try:
+        from .GEO.maps.SP import distritos
+    except ImportError:
+        return None
+    return distritos
+
+
+def hash_uniforms(indices):
+    """Três uniformes em [0, 1) por índice, determinísticos (finalizador do splitmix64, vetorizado)."""
+    z = np.asarray(indices, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    mask = np.uint64((1 << 21) - 1)
+    fields = [(z >> np.uint64(shift)) & mask for shift in (0, 21, 42)]
+    return np.stack(fields, axis=-1).astype(np.float64) / (1 << 21)
+
+def property_positions(market, indices, district_map=None):
+    """Posição (x, y) na tela do centro de cada imóvel, dentro do polígono do seu bairro.
+    O ponto vem de uniformes derivadas do índice no mercado (`hash_uniforms`), então o imóvel fica
+    sempre no mesmo lugar; sem `district_map`, cai em qualquer ponto de MAP_AREA."""
+    u = hash_uniforms(indices)
+    if district_map is not None:
+        districts = district_map.district_codes(market.bairros)[market.bairro[indices]]
+        return district_map.sample(districts, u)
+    return np.column_stack([MAP_AREA[0] + u[:, 1] * MAP_AREA[2], MAP_AREA[1] + u[:, 2] * MAP_AREA[3]])
+
+###################################################################################################################
+class PygameRenderer:
+    """
+    Renderizador pygame do HomeChoiceEnv, com custo pequeno por passo:
+    - o mapa de distritos é rasterizado uma única vez em uma superfície de fundo;
+    - os marcadores dos imóveis são sprites pré-desenhados, enviados em lote com `Surface.blits`;
+    - a cada quadro só as regiões alteradas (dirty rects) são restauradas do fundo e atualizadas na tela;
+    - a fonte é criada uma vez e os textos do HUD são reaproveitados enquanto não mudam.
+
+    Com `headless=True` desenha em uma superfície fora da tela, sem inicializar o display do SDL
+    (nem alterar o driver de vídeo do processo): `render()` devolve o quadro como array RGB (altura, largura, 3).
+    """
+    def __init__(self, width=800, height=600, district_map=None, headless=False, window=20, fps=60):
+        import pygame
+        self.pygame   = pygame
+        self.width    = width
+        self.height   = height
+        self.headless = headless
+        self.window   = window  # Número de anúncios exibidos a partir do passo atual
+        self.fps      = fps
+
+        pygame.font.init()
+        if headless:
+            self.screen = pygame.Surface((width, height))
+        else:
+            pygame.display.init()
+            self.screen = pygame.display.set_mode((width, height))
+            pygame.display.set_caption("🏡 Real Estate RL Simulator")
+        self.clock = pygame.time.Clock()
+        self.font  = pygame.font.SysFont("Arial", 18)
+
+        # Geometria pré-processada (GEO/maps/SP.npz); sem ela, usa o SP.py antigo se existir
+        self.district_map = district_map if district_map is not None else DistrictMap.load()
+        polygons = self.district_map.polygons() if self.district_map is not None else load_distritos()
+        self.background = self._rasterize_map(polygons)
+        self.sprites    = {color: self._marker(color) for color in (COLOR_AVAILABLE, COLOR_ANALYZED, COLOR_BOUGHT, COLOR_SOLD)}
+        self._text      = {}  # Cache texto -> superfície renderizada
+        self._dirty     = []  # Regiões desenhadas no quadro anterior
+        self.screen.blit(self.background, (0, 0))
+        self._full_update = True
+        self._frame = self._read_pixels(self.screen.get_rect()).copy() if headless else None  # Cópia RGB da tela (headless)
+
+    def _rasterize_map(self, polygons):
+        pygame = self.pygame
+        surface = pygame.Surface((self.width, self.height))
+        surface.fill(COLOR_BG)
+        for poly in polygons or ():
+            pygame.draw.polygon(surface, COLOR_DISTRICT, poly, width=0)
+            pygame.draw.polygon(surface, COLOR_OUTLINE, poly, width=1)
+        return surface if self.headless else surface.convert()
+
+    def _marker(self, color):
+        pygame = self.pygame
+        sprite = pygame.Surface((2 * ICON_RADIUS, 2 * ICON_RADIUS), pygame.SRCALPHA)
+        pygame.draw.circle(sprite, color, (ICON_RADIUS, ICON_RADIUS), ICON_RADIUS)
+        return sprite if self.headless else sprite.convert_alpha()
+
+    def _render_text(self, text):
+        surface = self._text.get(text)
+        if surface is None:
+            if len(self._text) > 512:
+                self._text.clear()
+            surface = self._text[text] = self.font.render(text, True, COLOR_TEXT)
+        return surface
+
+    def _read_pixels(self, rect):
+        """Pixels RGB de uma região da tela como array (altura, largura, 3)."""
+        data = self.pygame.image.tobytes(self.screen.subsurface(rect), "RGB")
+        return np.frombuffer(data, dtype=np.uint8).reshape(rect.height, rect.width, 3)
+
+###################################################################################################################
+    def positions(self, market, indices):
+        """Canto superior esquerdo do marcador de cada imóvel (ver `property_positions`)."""
+        return property_positions(market, indices, self.district_map).astype(np.int64) - ICON_RADIUS
+
+    def _markers(self, env):
+        """Lista (sprite, posição) de todos os marcadores do quadro, para um único `blits`."""
+        step, size = env.current_step, len(env.market)
+        groups = [
+            (np.arange(step + 1, min(step + self.window, size)), COLOR_AVAILABLE),
+            (env.portfolio.indices(), COLOR_BOUGHT),
+            (np.fromiter(env.recent_sales, dtype=np.int64), COLOR_SOLD),
+            (np.arange(step, min(step + 1, size)), COLOR_ANALYZED),
+        ]
+        batch = []
+        for indices, color in groups:
+            sprite = self.sprites[color]
+            batch.extend((sprite, tuple(p)) for p in self.positions(env.market, indices).tolist())
+        return batch
+
+    def _hud(self, env):
+        lines = [
+            f"Passo: {env.current_step}",
+            f"💵 Saldo: R${env.cash:,.0f}",
+            f"📦 Imóveis: {len(env.portfolio)}",
+            f"🧮 Patrimônio: R${env.cash + env._calculate_property_value():,.0f}",
+            f"⏳ Espera: {env.waiting_steps}",
+        ]
+        if env.current_step < len(env.market):
+            prop = env.market[env.current_step]
+            lines += [
+                f"🏘️ Tipo: {prop['tipo']}",
+                f"📍 Bairro: {prop['bairro']}",
+                f"💰 Preço: R${prop['preco']:,.0f}",
+                f"📐 Metragem: {prop['metragem']}m²",
+                f"🔢 IDH: {prop['idh_microrregiao']:.3f}",
+            ]
+        return [(self._render_text(text), (10, 10 + i * 22)) for i, text in enumerate(lines)]
+
+###################################################################################################################
+    def render(self, env):
+        """Desenha o estado atual de `env`. Devolve o quadro RGB no modo headless, senão None."""
+        pygame = self.pygame
+        screen = self.screen
+
+        # Apaga o quadro anterior restaurando apenas as regiões sujas a partir do fundo
+        for rect in self._dirty:
+            screen.blit(self.background, rect, rect)
+        drawn = screen.blits(self._markers(env) + self._hud(env), doreturn=True)
+        dirty, self._dirty = self._dirty + drawn, drawn
+
+        if self.headless:
+            # Atualiza a cópia RGB só nas regiões sujas, em vez de ler a tela inteira
+            bounds = screen.get_rect()
+            for rect in dirty:
+                rect = bounds.clip(rect)
+                if rect.width and rect.height:
+                    self._frame[rect.top:rect.bottom, rect.left:rect.right] = self._read_pixels(rect)
+            return self._frame.copy()
+        if self._full_update:
+            pygame.display.flip()
+            self._full_update = False
+        else:
+            pygame.display.update(dirty)
+        pygame.event.pump()
+        self.clock.tick(self.fps)
+        return None
+
+    def close(self):
+        """Fecha a janela deste renderizador (o modo headless não abre display); o pygame continua ativo
+        para outros renderizadores do processo."""
+        if not self.headless:
+            self.pygame.display.quit()
+        self._dirty = []
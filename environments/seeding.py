@@ -0,0 +1,14 @@
+import numpy as np
+
+###################################################################################################################
+def spawn_seeds(seed, n):
+    """Deriva `n` sementes inteiras independentes de uma única semente via `SeedSequence.spawn`.
+    Use para semear ambientes paralelos/vetorizados sem correlação entre os fluxos aleatórios."""
+    return [int(child.generate_state(1, np.uint64)[0]) for child in np.random.SeedSequence(seed).spawn(n)]
+
+
+def market_rng(seed):
+    """Gerador usado para criar o mercado de uma semente.
+    É um filho da SeedSequence da semente, independente do fluxo de `np_random` do ambiente,
+    então o mercado é o mesmo com ou sem cache e não consome números da dinâmica do episódio."""
+    return np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
@@ -0,0 +1,186 @@
+import numpy as np
+from gymnasium import spaces
+from gymnasium.utils import seeding
+from gymnasium.vector import AutoresetMode, VectorEnv
+from gymnasium.vector.utils import batch_space
+
+from .core import FORCE_AFTER, SALE_DISCOUNT, SALE_RANGE, SALE_STALE, TICK, buy_reward, sale_reward
+from .events import MarketEventEngine
+from .market import IDH_BAIRROS, Market, generate_columns
+
+###################################################################################################################
+class VectorHomeChoiceEnv(VectorEnv):
+    """
+    Versão vetorizada do HomeChoiceEnv: N mercados independentes guardados como colunas (N, M)
+    e avançados juntos em uma única chamada de `step`, sem loop Python por sub-ambiente.
+    Segue o contrato do `gymnasium.vector.VectorEnv` com reset automático no mesmo passo
+    (a observação final fica em `infos["final_obs"]`), podendo substituir um
+    `SyncVectorEnv` de HomeChoiceEnv. Todos os sorteios usam o Generator `self.np_random`.
+    """
+    metadata = {"autoreset_mode": AutoresetMode.SAME_STEP}
+
+    def __init__(self, num_envs, market_size=100000, idh_bairros=None, market=None, seed=None, stale_after=30, stale_decay=0.0):
+        self.num_envs                 = num_envs
+        self.market_size              = market_size
+        self.stale_after              = stale_after  # Desgaste de mercado, como no HomeChoiceEnv
+        self.stale_decay              = stale_decay
+        self.idh_bairros              = dict(idh_bairros if idh_bairros is not None else IDH_BAIRROS)
+        self.initial_cash             = 100000
+        self.single_action_space      = spaces.Discrete(3)  # 0 = Comprar, 1 = Esperar, 2 = Vender
+        self.single_observation_space = spaces.Box(low=0, high=1, shape=(6,), dtype=np.float32)
+        self.action_space             = batch_space(self.single_action_space, num_envs)
+        self.observation_space        = batch_space(self.single_observation_space, num_envs)
+        self.events                   = MarketEventEngine()
+        if seed is not None:
+            self._np_random, self._np_random_seed = seeding.np_random(seed)  # Um único Generator para os N mercados
+        self.market                   = market  # Colunas (N, M) externas, ex.: em memória compartilhada
+        if self.market is None:
+            self.market = Market(generate_columns(self.idh_bairros, (num_envs, market_size), self.np_random), self.idh_bairros)
+
+        self.cash          = np.full(num_envs, self.initial_cash, dtype=np.float64)
+        self.current_step  = np.zeros(num_envs, dtype=np.int64)
+        self.waiting_steps = np.zeros(num_envs, dtype=np.int64)
+
+        # Carteira de cada sub-ambiente: fila circular de índices no mercado (vende-se sempre o mais antigo)
+        self._owned       = np.zeros((num_envs, 16), dtype=np.int64)
+        self._owned_head  = np.zeros(num_envs, dtype=np.int64)
+        self._owned_count = np.zeros(num_envs, dtype=np.int64)
+        self._rows        = np.arange(num_envs)
+
+###################################################################################################################
+    def get_market(self, i):
+        """Mercado do sub-ambiente i (as colunas são visões das linhas empilhadas)."""
+        return Market({name: column[i] for name, column in self.market.columns().items()}, self.market.table)
+
+    def owned_indices(self, i):
+        """Índices no mercado dos imóveis do sub-ambiente i, do mais antigo ao mais recente."""
+        cap = self._owned.shape[1]
+        pos = (self._owned_head[i] + np.arange(self._owned_count[i])) % cap
+        return self._owned[i, pos]
+
+    def portfolio_value(self):
+        """Valor de mercado atual da carteira de cada sub-ambiente, formato (N,), em um único gather."""
+        cap = self._owned.shape[1]
+        held = (np.arange(cap) - self._owned_head[:, None]) % cap < self._owned_count[:, None]
+        precos = self.market.preco[self._rows[:, None], self._owned]
+        return np.where(held, precos, 0.0).sum(axis=1)
+
+    def _push_owned(self, rows, indices):
+        cap = self._owned.shape[1]
+        if (self._owned_count[rows] >= cap).any():
+            # Desenrola a fila circular em um buffer com o dobro da capacidade
+            order = (self._owned_head[:, None] + np.arange(cap)) % cap
+            grown = np.zeros((self.num_envs, 2 * cap), dtype=np.int64)
+            grown[:, :cap] = np.take_along_axis(self._owned, order, axis=1)
+            self._owned, self._owned_head[:] = grown, 0
+            cap *= 2
+        self._owned[rows, (self._owned_head[rows] + self._owned_count[rows]) % cap] = indices
+        self._owned_count[rows] += 1
+
+    def _pop_owned(self, rows):
+        indices = self._owned[rows, self._owned_head[rows]]
+        self._owned_head[rows] = (self._owned_head[rows] + 1) % self._owned.shape[1]
+        self._owned_count[rows] -= 1
+        return indices
+
+###################################################################################################################
+    def _get_observation(self):
+        """Observações normalizadas de todos os sub-ambientes, formato (N, 6)."""
+        idx = np.minimum(self.current_step, self.market_size - 1)
+        m, r = self.market, self._rows
+        obs = np.stack([
+            m.preco[r, idx] / 5000000,
+            m.demanda[r, idx] / 1000,
+            m.take("idh", (r, idx)),
+            m.take("crime", (r, idx)),
+            m.take("infra", (r, idx)),
+            self.cash / 1000000,
+        ], axis=1).astype(np.float32)
+        obs[self.current_step >= self.market_size] = 0
+        return obs
+
+    def _reset_envs(self, rows):
+        """Gera novos mercados e zera o estado dos sub-ambientes indicados."""
+        columns = generate_columns(self.idh_bairros, (len(rows), self.market_size), self.np_random)
+        for name, column in columns.items():
+            getattr(self.market, name)[rows] = column
+        self.cash[rows] = self.initial_cash
+        self.current_step[rows] = 0
+        self.waiting_steps[rows] = 0
+        self._owned_head[rows] = 0
+        self._owned_count[rows] = 0
+
+    def reset(self, seed=None, options=None):
+        """Reseta os sub-ambientes (todos, ou os de `options["reset_mask"]`). Retorna (observações, infos)."""
+        super().reset(seed=seed)
+        rows = self._rows
+        if options is not None and "reset_mask" in options:
+            rows = np.flatnonzero(options["reset_mask"])
+        self._reset_envs(rows)
+        return self._get_observation(), {}
+
+###################################################################################################################
+    def step(self, actions):
+        """Avança todos os sub-ambientes. Retorna (observações, recompensas, terminações, truncamentos, infos)."""
+        actions = np.array(actions, dtype=np.int64)
+        m, r = self.market, self._rows
+        terminated = self.current_step >= self.market_size - 1
+        active = ~terminated
+        rewards = np.zeros(self.num_envs, dtype=np.float64)
+
+        idx = np.minimum(self.current_step, self.market_size - 1)
+        price = m.preco[r, idx]
+
+        # Se o agente ficou esperando por FORCE_AFTER passos ou mais, força uma compra
+        actions[self.waiting_steps >= FORCE_AFTER] = 0
+
+        # Comprar
+        buy = np.flatnonzero(active & (actions == 0) & (self.cash >= price))
+        if buy.size:
+            self._push_owned(buy, idx[buy])
+            m.tempo_no_mercado[buy, idx[buy]] = 0
+            self.cash[buy] -= price[buy]
+            rewards[buy] = buy_reward(price[buy])
+            self.waiting_steps[buy] = 0
+
+        # Vender o imóvel mais antigo da carteira
+        sell = np.flatnonzero(active & (actions == 2) & (self._owned_count > 0))
+        if sell.size:
+            sold = self._pop_owned(sell)
+            base = m.preco[sell, sold]
+            sell_price = base * self.np_random.uniform(*SALE_RANGE, size=sell.size)
+            sell_price[m.tempo_no_mercado[sell, sold] > SALE_STALE] *= SALE_DISCOUNT
+            m.tempo_no_mercado[sell, sold] = 0
+            rewards[sell] = sale_reward(sell_price, base)
+            self.cash[sell] += sell_price
+            self.waiting_steps[sell] = 0
+
+        # Esperar
+        self.waiting_steps[active & (actions == 1)] += 1
+
+        # Eventos de mercado a cada 10 passos, sorteados por sub-ambiente
+        due = active & (self.current_step % TICK == 0)
+        if due.any():
+            # Envelhecimento dos 10 passos desde o último tick (não há tick anterior no passo 0)
+            aging = np.flatnonzero(due & (self.current_step > 0))
+            if aging.size:
+                m.age(TICK, self.stale_after, self.stale_decay, rows=aging)
+            events = np.full(self.num_envs, -1, dtype=np.int64)
+            events[due] = self.events.sample(self.np_random, size=int(due.sum()))
+            self.events.apply_batch(m, events, self.np_random)
+
+        self.current_step[active] += 1
+        obs = self._get_observation()
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        infos = {}
+
+        done = np.flatnonzero(terminated)
+        if done.size:
+            final_obs = np.full(self.num_envs, None, dtype=object)
+            for i in done:
+                final_obs[i] = obs[i].copy()
+            infos["final_obs"], infos["_final_obs"] = final_obs, terminated.copy()
+            self._reset_envs(done)
+            obs[done] = self._get_observation()[done]
+
+        return obs, rewards, terminated, truncated, infos
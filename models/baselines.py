@@ -0,0 +1,58 @@
+"""
+Políticas de referência vetorizadas para o HomeChoiceEnv.
+
+Cada política recebe o lote de observações "basic" (N, 6) e um np.random.Generator e devolve
+as N ações (0 = Comprar, 1 = Esperar, 2 = Vender) de uma vez, sem loop Python por ambiente.
+Servem de linha de base para comparar novos agentes no mesmo `RolloutRunner` (train.py).
+"""
+import numpy as np
+
+# Escalas da observação "basic" (ver environments/observation.py)
+PRICE_SCALE = 5000000  # obs[:, 0] = preço / 5.000.000
+CASH_SCALE  = 1000000  # obs[:, 5] = saldo / 1.000.000
+
+BUY, WAIT, SELL = 0, 1, 2
+
+###################################################################################################################
+class RandomPolicy:
+    """Ações uniformes entre Comprar, Esperar e Vender."""
+    name = "random"
+
+    def __call__(self, obs, rng):
+        return rng.integers(0, 3, size=len(obs))
+
+
+class WaitPolicy:
+    """Sempre espera (o ambiente ainda força uma compra após 20 esperas seguidas)."""
+    name = "wait"
+
+    def __call__(self, obs, rng):
+        return np.full(len(obs), WAIT, dtype=np.int64)
+
+
+class PriceThresholdPolicy:
+    """Compra o anúncio atual quando custa até `max_fraction` do saldo; com o saldo abaixo de `sell_below`
+    (capital preso em imóveis) vende o imóvel mais antigo; senão espera.
+    Decide só pela observação, sem estado: o mesmo objeto e a mesma semente reproduzem o resultado.
+    Os anúncios custam mais que o saldo inicial, então sem a venda ela seria a WaitPolicy: a compra
+    forçada após 20 esperas já leva o primeiro anúncio que cabe no saldo."""
+    name = "threshold"
+
+    def __init__(self, max_fraction=0.9, sell_below=50000):
+        self.max_fraction = max_fraction
+        self.sell_below   = sell_below
+
+    def __call__(self, obs, rng):
+        price = obs[:, 0] * PRICE_SCALE
+        cash = obs[:, 5] * CASH_SCALE
+        actions = np.where(price <= self.max_fraction * cash, BUY, WAIT)
+        actions[(actions == WAIT) & (cash < self.sell_below)] = SELL
+        return actions
+
+###################################################################################################################
+# Políticas de referência pelo nome (usado pelo train.py)
+BASELINES = {
+    RandomPolicy.name: RandomPolicy,
+    WaitPolicy.name: WaitPolicy,
+    PriceThresholdPolicy.name: PriceThresholdPolicy,
+}
@@ -3,7 +3,6 @@ import time
 import sys
 import os
 import importlib
-import random
 
 # Caminhos
 sys.path.append(os.path.abspath("."))
@@ -13,10 +12,12 @@ import RL.environments.HomeChoice_v0 as home_env
 importlib.reload(home_env)
 HomeChoiceEnv = home_env.HomeChoiceEnv
 
-from RL.environments.GEO.maps.SP import distritos
+from RL.environments.geometry import DistrictMap
+from RL.environments.render import load_distritos, property_positions
 
-# Seed para consistência na posição dos ícones
-random.seed(42)
+# Geometria pré-processada dos distritos (GEO/maps/SP.npz); sem ela, usa o SP.py antigo
+district_map = DistrictMap.load()
+distritos = district_map.polygons() if district_map is not None else load_distritos() or []
 
 # Cores
 COLOR_BG = (240, 240, 240)
@@ -36,24 +37,18 @@ def draw_distritos(screen):
         pygame.draw.polygon(screen, COLOR_OUTLINE, poly, width=1)
 
 
-def draw_imoveis(screen, mercado, current_step, comprados, vendidos):
-    for i, prop in enumerate(mercado[current_step:current_step+20]):
-        if "pos" not in prop:
-            # Posição aleatória temporária (depois pode ser vinculada ao bairro)
-            x = random.randint(100, 700)
-            y = random.randint(100, 500)
-            prop["pos"] = (x, y)
-
-        color = COLOR_ANALYZED if i == 0 else COLOR_AVAILABLE
-        pygame.draw.circle(screen, color, prop["pos"], ICON_RADIUS)
+def draw_marcadores(screen, mercado, indices, color):
+    # Cada imóvel fica sempre no mesmo ponto, dentro do seu bairro (mesmas posições do PygameRenderer)
+    for x, y in property_positions(mercado, indices, district_map).astype(int).tolist():
+        pygame.draw.circle(screen, color, (x, y), ICON_RADIUS)
 
-    for prop in comprados:
-        if "pos" in prop:
-            pygame.draw.circle(screen, COLOR_BOUGHT, prop["pos"], ICON_RADIUS)
 
-    for prop in vendidos:
-        if "pos" in prop:
-            pygame.draw.circle(screen, COLOR_SOLD, prop["pos"], ICON_RADIUS)
+def draw_imoveis(screen, mercado, current_step, comprados, vendidos):
+    janela = list(range(current_step, min(current_step + 20, len(mercado))))
+    draw_marcadores(screen, mercado, janela[1:], COLOR_AVAILABLE)
+    draw_marcadores(screen, mercado, janela[:1], COLOR_ANALYZED)
+    draw_marcadores(screen, mercado, comprados, COLOR_BOUGHT)
+    draw_marcadores(screen, mercado, vendidos, COLOR_SOLD)
 
 
 def draw_hud(screen, env, step):
@@ -78,7 +73,6 @@ if __name__ == "__main__":
 
     env = HomeChoiceEnv()
     obs = env.reset()
-    vendidos = []
 
     for step in range(500):
         screen.fill(COLOR_BG)
@@ -87,14 +81,9 @@ if __name__ == "__main__":
         action = env.action_space.sample()
         obs, reward, done, _ = env.step(action)
 
-        # Armazena venda se houver
-        if action == 2 and hasattr(env, "last_sold"):
-            vendidos.append(env.last_sold)
-            delattr(env, "last_sold")
-
         # Desenhos
         draw_distritos(screen)
-        draw_imoveis(screen, env.market, env.current_step, env.owned_properties, vendidos)
+        draw_imoveis(screen, env.market, env.current_step, env.portfolio.indices(), list(env.recent_sales))
         draw_hud(screen, env, step)
 
         pygame.display.flip()
@@ -103,6 +92,7 @@ if __name__ == "__main__":
             if event.type == pygame.QUIT or (
                 event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE
             ):
+                env.close()
                 pygame.quit()
                 exit()
 
@@ -112,4 +102,5 @@ if __name__ == "__main__":
         if done:
             break
 
+    env.close()
     pygame.quit()
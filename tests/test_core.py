@@ -0,0 +1,61 @@
+"""
+Núcleo funcional (environments/core.py). O HomeChoiceEnv usa `core.act` no modo discreto, mas
+o tick do mercado passa pelo `Market` (eventos com máscara, mercado preguiçoso, índice por bairro)
+e a observação pelo ObservationBuilder: com a mesma semente, as trajetórias do modo discreto com
+observação "basic" precisam ser idênticas às do `core.step`.
+"""
+import numpy as np
+import pytest
+
+from environments.core import CoreHomeChoiceEnv, fork, init_state, owned_indices, rollout, step
+from environments.HomeChoice_v0 import HomeChoiceEnv
+from environments.market import IDH_BAIRROS, Market
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"stale_after": 15, "stale_decay": 0.02}])
+@pytest.mark.parametrize("seed", [0, 7])
+def test_core_matches_env(seed, kwargs):
+    market_size = 600
+    env = HomeChoiceEnv(render_mode=None, market_size=market_size, **kwargs)
+    core = CoreHomeChoiceEnv(market_size=market_size, **kwargs)
+    np.testing.assert_array_equal(env.reset(seed=seed), core.reset(seed=seed))
+
+    # Ações aleatórias até depois do fim do episódio
+    for action in np.random.default_rng(seed).integers(0, 3, size=market_size + 20).tolist():
+        obs_env, reward_env, done_env, _ = env.step(action)
+        obs_core, reward_core, done_core, _ = core.step(action)
+        np.testing.assert_array_equal(obs_env, obs_core)
+        assert (reward_env, done_env) == (reward_core, done_core)
+        assert (env.cash, env.waiting_steps) == (core.state.cash, core.state.waiting)
+        assert env.portfolio.indices().tolist() == owned_indices(core.state).tolist()
+        assert env.portfolio.value == pytest.approx(core.state.value, rel=1e-9)
+        np.testing.assert_array_equal(env.market.preco, core.state.preco)
+
+
+def test_fork_replays_identically():
+    env = CoreHomeChoiceEnv(market_size=2000, stale_after=15, stale_decay=0.02)
+    env.reset(seed=3)
+    actions = np.random.default_rng(3).integers(0, 3, size=(2, 800))
+    env.state, _ = rollout(env.state, actions[0], env.np_random)
+
+    snapshot = env.get_state()
+    first = [env.step(a)[:2] for a in actions[1].tolist()]
+    env.set_state(snapshot)
+    second = [env.step(a)[:2] for a in actions[1].tolist()]
+    for (obs_a, reward_a), (obs_b, reward_b) in zip(first, second):
+        np.testing.assert_array_equal(obs_a, obs_b)
+        assert reward_a == reward_b
+
+
+def test_step_writes_fixed_buffers_in_place():
+    """Comprar escreve nos buffers da carteira e do mercado, sem copiá-los a cada passo."""
+    state = init_state(Market.generate(IDH_BAIRROS, size=500, rng=np.random.default_rng(0)))
+    state = state._replace(cash=1e12)
+    owned, tempo = state.owned, state.tempo_no_mercado
+    rng = np.random.default_rng(0)
+    for _ in range(len(owned) - 1):
+        state, _, _, _ = step(state, 0, rng)
+    assert state.owned is owned and state.tempo_no_mercado is tempo
+    assert owned_indices(state).tolist() == list(range(len(owned) - 1))
+    forked = fork(state)
+    assert forked.owned is not owned and forked.preco is not state.preco
@@ -0,0 +1,37 @@
+"""
+LazyMarket (environments/market.py): cada bloco tem seu próprio fluxo aleatório e os eventos
+passados são reaplicados ao materializá-lo, então os preços não dependem de quando cada bloco
+foi criado em relação aos eventos e ao envelhecimento.
+"""
+import numpy as np
+import pytest
+
+from environments.events import MarketEventEngine
+from environments.market import IDH_BAIRROS, LazyMarket
+
+
+@pytest.mark.parametrize("decay", [0.0, 0.01])
+@pytest.mark.parametrize("seed", [0, 3])
+def test_lazy_market_independent_of_materialization_order(seed, decay):
+    engine = MarketEventEngine()
+    size, chunk = 2500, 400
+    events = np.random.default_rng(seed).choice(len(engine.events), size=40)
+
+    eager = LazyMarket(IDH_BAIRROS, size, seed, engine, chunk)
+    eager.ensure(size - 1)  # Tudo materializado antes do primeiro evento
+    late = LazyMarket(IDH_BAIRROS, size, seed, engine, chunk)  # Só o primeiro bloco
+    gradual = LazyMarket(IDH_BAIRROS, size, seed, engine, chunk)
+
+    for tick, event in enumerate(events.tolist()):
+        for market in (eager, late, gradual):
+            market.age(10, stale_after=30, decay=decay)
+            market.apply_event(engine, event)
+        gradual.ensure(min(tick * 100, size - 1))  # Um bloco novo a cada poucos eventos
+    late.ensure(size - 1)
+    gradual.ensure(size - 1)
+
+    for market in (late, gradual):
+        assert market.materialized == eager.materialized == size
+        np.testing.assert_allclose(market.preco, eager.preco, rtol=1e-12)
+        np.testing.assert_array_equal(market.tempo_no_mercado, eager.tempo_no_mercado)
+        np.testing.assert_array_equal(market.bairro, eager.bairro)
@@ -0,0 +1,58 @@
+"""
+Holdings (environments/portfolio.py) contra uma referência de força bruta: um dicionário
+id -> (preço pago, ganho, versão) ordenado a cada consulta. Cobre o heap com remoção
+preguiçosa, a remoção por troca com o último e as versões das entradas.
+"""
+import numpy as np
+import pytest
+
+from environments.portfolio import Holdings
+
+
+def _ranking(reference):
+    """Ids do maior para o menor ganho; empates pela ordem de compra (versão), como no heap."""
+    return [i for i, _ in sorted(reference.items(), key=lambda item: (-item[1][1], item[1][2]))]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_holdings_matches_sorted_reference(seed):
+    rng = np.random.default_rng(seed)
+    preco = rng.uniform(1e5, 1e6, size=200)
+    holdings, reference, version = Holdings(capacity=4), {}, 0
+
+    for _ in range(3000):
+        op = rng.integers(0, 4)
+        if op == 0:  # Compra de um imóvel fora da carteira (ganho inicial zero)
+            free = np.setdiff1d(np.arange(len(preco)), list(reference))
+            if free.size:
+                index = int(rng.choice(free))
+                version += 1
+                holdings.buy(index, preco[index])
+                reference[index] = (preco[index], 0.0, version)
+        elif op == 1 and reference:  # Venda por id
+            index = int(rng.choice(list(reference)))
+            assert holdings.sell(index, preco) == index
+            del reference[index]
+        elif op == 2 and reference:  # Venda pelo ranking de ganho
+            rank = int(rng.integers(0, len(reference) + 3))
+            expected = _ranking(reference)[min(rank, len(reference) - 1)]
+            assert holdings.sell_ranked(rank, preco) == expected
+            del reference[expected]
+        elif op == 3:  # Evento de mercado: muda preços e reavalia
+            touched = rng.choice(len(preco), size=20, replace=False)
+            preco[touched] *= rng.uniform(0.8, 1.2, size=20)
+            holdings.revalue(preco)
+            reference = {i: (paid, preco[i] - paid, v) for i, (paid, _, v) in reference.items()}
+
+        assert len(holdings) == len(reference)
+        assert sorted(holdings.indices().tolist()) == sorted(reference)
+        assert all(i in holdings for i in reference)
+        paid = dict(zip(holdings.indices().tolist(), holdings.buy_prices().tolist()))
+        assert paid == {i: p for i, (p, _, _) in reference.items()}
+        assert holdings.value == pytest.approx(sum(preco[i] for i in reference), rel=1e-9, abs=1e-6)
+        if reference:
+            ranking = _ranking(reference)
+            for rank in range(min(3, len(ranking))):
+                assert holdings.best(rank) == ranking[rank]
+        else:
+            assert holdings.best() is None
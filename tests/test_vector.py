@@ -0,0 +1,39 @@
+"""
+O VectorHomeChoiceEnv (environments/vector.py) reimplementa as regras do HomeChoiceEnv em lote:
+com um único sub-ambiente, o mesmo mercado e o mesmo estado do gerador, as trajetórias
+do modo discreto com observação "basic" precisam ser idênticas.
+"""
+import numpy as np
+import pytest
+
+from environments.bairro_index import BairroIndex
+from environments.HomeChoice_v0 import HomeChoiceEnv
+from environments.market import Market
+from environments.vector import VectorHomeChoiceEnv
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"stale_after": 15, "stale_decay": 0.02}])
+@pytest.mark.parametrize("seed", [0, 7])
+def test_vector_matches_env(seed, kwargs):
+    market_size = 600
+    vec = VectorHomeChoiceEnv(1, market_size=market_size, seed=seed, **kwargs)
+    obs_vec, _ = vec.reset(seed=seed)
+
+    # O HomeChoiceEnv recebe uma cópia do mercado do sub-ambiente e o mesmo estado do gerador
+    env = HomeChoiceEnv(render_mode=None, market_size=market_size, **kwargs)
+    env.reset(seed=seed)
+    env.market = Market({name: column.copy() for name, column in vec.get_market(0).columns().items()}, env.idh_bairros)
+    env.bairro_index = BairroIndex(env.market, len(env.idh_bairros))
+    env.np_random.bit_generator.state = vec.np_random.bit_generator.state
+    np.testing.assert_array_equal(env._get_observation(), obs_vec[0])
+
+    # Ações aleatórias até o último passo do episódio (depois dele o vetorizado reseta sozinho)
+    for action in np.random.default_rng(seed).integers(0, 3, size=market_size - 1).tolist():
+        obs_vec, rewards, terminated, _, _ = vec.step([action])
+        obs_env, reward_env, done_env, _ = env.step(action)
+        np.testing.assert_array_equal(obs_vec[0], obs_env)
+        assert (rewards[0], terminated[0]) == (reward_env, done_env)
+        assert (vec.cash[0], vec.waiting_steps[0]) == (env.cash, env.waiting_steps)
+        assert vec.owned_indices(0).tolist() == env.portfolio.indices().tolist()
+        assert vec.portfolio_value()[0] == pytest.approx(env.portfolio.value, rel=1e-9)
+        np.testing.assert_array_equal(vec.market.preco[0], env.market.preco)
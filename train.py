@@ -0,0 +1,203 @@
+"""
+Rollouts em lote do HomeChoiceEnv e avaliação das políticas de referência.
+
+O `RolloutRunner` conduz um VectorHomeChoiceEnv (N ambientes avançados juntos), grava as
+transições em um `RolloutBuffer` pré-alocado e mede retornos, passos até R$ 1.000.000 de
+patrimônio e throughput. Qualquer política com a assinatura `policy(obs, rng) -> ações`
+(ver models/baselines.py) pode ser comparada com as linhas de base nas mesmas condições.
+
+Uso (na raiz do repositório):
+    python train.py --policies random wait threshold --num-envs 64 --steps 5000 --output rollouts.json
+"""
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+
+from environments.vector import VectorHomeChoiceEnv
+from models.baselines import BASELINES
+
+GOAL = 1000000  # Patrimônio (saldo + carteira) que o agente precisa atingir
+
+###################################################################################################################
+class RolloutBuffer:
+    """
+    Buffer circular de transições com memória fixa: `capacity` passos de `num_envs` ambientes.
+    Todos os arrays são alocados na criação; quando enche, os passos mais antigos são sobrescritos.
+    `next_obs` é a observação final do episódio quando `terminated` (e não a do reset automático).
+    """
+    def __init__(self, capacity, num_envs, obs_shape, obs_dtype=np.float32):
+        self.capacity   = capacity
+        self.num_envs   = num_envs
+        self.obs        = np.zeros((capacity, num_envs, *obs_shape), dtype=obs_dtype)
+        self.next_obs   = np.zeros((capacity, num_envs, *obs_shape), dtype=obs_dtype)
+        self.actions    = np.zeros((capacity, num_envs), dtype=np.int8)
+        self.rewards    = np.zeros((capacity, num_envs), dtype=np.float64)
+        self.terminated = np.zeros((capacity, num_envs), dtype=bool)
+        self.pos        = 0  # Próxima posição a ser escrita
+        self.size       = 0  # Passos válidos no buffer
+
+    def __len__(self):
+        return self.size
+
+    def add(self, obs, actions, rewards, next_obs, terminated):
+        """Grava um passo dos N ambientes."""
+        pos = self.pos
+        self.obs[pos]        = obs
+        self.next_obs[pos]   = next_obs
+        self.actions[pos]    = actions
+        self.rewards[pos]    = rewards
+        self.terminated[pos] = terminated
+        self.pos = (pos + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, rng):
+        """Lote uniforme de transições (replay), como dicionário de arrays de tamanho `batch_size`."""
+        t = rng.integers(0, self.size, size=batch_size)
+        e = rng.integers(0, self.num_envs, size=batch_size)
+        return {
+            "obs": self.obs[t, e],
+            "actions": self.actions[t, e],
+            "rewards": self.rewards[t, e],
+            "next_obs": self.next_obs[t, e],
+            "terminated": self.terminated[t, e],
+        }
+
+    def trajectory(self):
+        """Passos gravados em ordem cronológica, formato (passos, N, ...)."""
+        order = (np.arange(self.size) + (self.pos - self.size)) % self.capacity
+        return {
+            "obs": self.obs[order],
+            "actions": self.actions[order],
+            "rewards": self.rewards[order],
+            "next_obs": self.next_obs[order],
+            "terminated": self.terminated[order],
+        }
+
+    def clear(self):
+        self.pos = self.size = 0
+
+###################################################################################################################
+class RolloutRunner:
+    """
+    Executa uma política em lote sobre um VectorHomeChoiceEnv.
+    Por ambiente acompanha o retorno e o passo em que o patrimônio atingiu `goal` no episódio
+    corrente; episódios encerrados (reset automático do ambiente vetorizado) entram no relatório.
+    """
+    def __init__(self, env, buffer=None, goal=GOAL):
+        self.env    = env
+        self.buffer = buffer
+        self.goal   = goal
+
+    def run(self, policy, num_steps, seed=None):
+        """Roda `num_steps` passos de todos os ambientes a partir de um reset e devolve o relatório."""
+        env, buffer, n = self.env, self.buffer, self.env.num_envs
+        rng = np.random.default_rng(seed)
+        obs, _ = env.reset(seed=seed)
+
+        returns    = np.zeros(n, dtype=np.float64)    # Retorno do episódio corrente
+        goal_step  = np.full(n, -1, dtype=np.int64)   # Passo do episódio em que atingiu a meta (-1 = ainda não)
+        finished   = {"returns": [], "goal_steps": []}  # Episódios encerrados (todos duram market_size passos)
+        policy_time = 0.0
+
+        start = time.perf_counter()
+        for _ in range(num_steps):
+            tick = time.perf_counter()
+            actions = policy(obs, rng)
+            policy_time += time.perf_counter() - tick
+            next_obs, rewards, terminated, _, infos = env.step(actions)
+            returns += rewards
+
+            if terminated.any():
+                done = np.flatnonzero(terminated)
+                if buffer is not None:
+                    final = next_obs.copy()
+                    final[done] = np.stack(infos["final_obs"][done])
+                    buffer.add(obs, actions, rewards, final, terminated)
+                finished["returns"].extend(returns[done].tolist())
+                finished["goal_steps"].extend(goal_step[done].tolist())
+                returns[done] = 0.0
+                goal_step[done] = -1
+            elif buffer is not None:
+                buffer.add(obs, actions, rewards, next_obs, terminated)
+
+            # Meta: saldo + valor de mercado da carteira (ambientes recém-resetados recomeçam do zero)
+            worth = env.cash + env.portfolio_value()
+            reached = (goal_step < 0) & (worth >= self.goal) & ~terminated
+            goal_step[reached] = env.current_step[reached]
+            obs = next_obs
+        elapsed = time.perf_counter() - start
+
+        return {
+            "policy": getattr(policy, "name", type(policy).__name__),
+            "num_envs": n,
+            "steps": num_steps,
+            "env_steps_per_sec": n * num_steps / elapsed,
+            "policy_time_fraction": policy_time / elapsed,
+            "episodes": {
+                "count": len(finished["returns"]),
+                "returns": _summary(finished["returns"]),
+                "reached_goal": _fraction_reached(finished["goal_steps"]),
+                "steps_to_goal": _summary([s for s in finished["goal_steps"] if s >= 0]),
+            },
+            "running": {  # Episódios ainda em andamento ao fim dos `num_steps`
+                "returns": _summary(returns),
+                "worth": _summary(env.cash + env.portfolio_value()),
+                "reached_goal": _fraction_reached(goal_step),
+                "steps_to_goal": _summary(goal_step[goal_step >= 0]),
+            },
+        }
+
+
+def _summary(values):
+    values = np.asarray(values, dtype=np.float64)
+    if values.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(values.size),
+        "mean": float(values.mean()),
+        "std": float(values.std()),
+        "min": float(values.min()),
+        "median": float(np.median(values)),
+        "max": float(values.max()),
+    }
+
+
+def _fraction_reached(goal_steps):
+    goal_steps = np.asarray(goal_steps)
+    return float((goal_steps >= 0).mean()) if goal_steps.size else None
+
+###################################################################################################################
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rollouts em lote das políticas de referência do HomeChoiceEnv")
+    parser.add_argument("--policies", nargs="+", default=list(BASELINES), choices=list(BASELINES), help="políticas avaliadas")
+    parser.add_argument("--num-envs", type=int, default=64, help="ambientes avançados juntos")
+    parser.add_argument("--steps", type=int, default=5000, help="passos por ambiente")
+    parser.add_argument("--market-size", type=int, default=2000, help="imóveis por mercado (= duração do episódio)")
+    parser.add_argument("--buffer", type=int, default=0, help="capacidade (em passos) do RolloutBuffer; 0 = sem buffer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="arquivo JSON de saída (opcional)")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for name in args.policies:
+        env = VectorHomeChoiceEnv(args.num_envs, market_size=args.market_size, seed=args.seed)
+        buffer = RolloutBuffer(args.buffer, args.num_envs, env.single_observation_space.shape) if args.buffer else None
+        report = RolloutRunner(env, buffer).run(BASELINES[name](), args.steps, seed=args.seed)
+        episodes = report["episodes"]
+        print(f"[{name}] {report['env_steps_per_sec']:,.0f} passos/s | episódios: {episodes['count']} | "
+              f"retorno médio: {episodes['returns'].get('mean', float('nan')):.2f} | "
+              f"meta atingida: {episodes['reached_goal']}", file=sys.stderr)
+        reports.append(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": reports}, f, indent=2)
+        print(f"✅ Resultados salvos em '{args.output}'", file=sys.stderr)
+    return reports
+
+
+if __name__ == "__main__":
+    main()
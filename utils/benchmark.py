@@ -0,0 +1,174 @@
+"""
+Benchmark de throughput do HomeChoiceEnv.
+
+Mede latência de reset, passos/s com e sem eventos de mercado, custo de `_apply_market_events`,
+montagem da observação, renderização headless e o VectorHomeChoiceEnv, para vários tamanhos de
+mercado e números de ambientes. Os resultados são gravados em JSON para acompanhar regressões
+entre commits.
+
+Uso (na raiz do repositório):
+    python -m utils.benchmark --sizes 1000 100000 1000000 --num-envs 1 8 32 --output bench.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath("."))
+
+from environments.HomeChoice_v0 import HomeChoiceEnv
+from environments.vector import VectorHomeChoiceEnv
+
+###################################################################################################################
+def _stats(samples):
+    """Resumo de uma lista de tempos em segundos."""
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(samples.size),
+        "mean_ms": float(samples.mean() * 1e3),
+        "median_ms": float(np.median(samples) * 1e3),
+        "p95_ms": float(np.percentile(samples, 95) * 1e3),
+        "per_sec": float(samples.size / samples.sum()) if samples.sum() > 0 else None,
+    }
+
+
+def _timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+###################################################################################################################
+def bench_env(market_size, steps, resets, observation, seed):
+    """Benchmark de um único HomeChoiceEnv com `market_size` imóveis."""
+    env = HomeChoiceEnv(render_mode=None, observation=observation, market_size=market_size)
+    result = {"kind": "env", "market_size": market_size, "observation": observation}
+    result["reset"] = _stats(_timeit(lambda: env.reset(seed=seed), resets))
+
+    # Passos classificados pela ocorrência de evento de mercado (a cada 10 passos)
+    env.reset(seed=seed)
+    actions = np.random.default_rng(seed).integers(0, 3, size=steps)
+    with_events, without_events = [], []
+    for action in actions:
+        if env.current_step >= len(env.market) - 1:
+            env.reset()
+        has_event = env.current_step % 10 == 0
+        start = time.perf_counter()
+        env.step(int(action))
+        (with_events if has_event else without_events).append(time.perf_counter() - start)
+    result["step"] = _stats(with_events + without_events)
+    result["step_with_events"] = _stats(with_events)
+    result["step_without_events"] = _stats(without_events)
+
+    repeat = max(steps // 20, 5)
+    result["apply_market_events"] = _stats(_timeit(env._apply_market_events, repeat))
+    result["observation"] = _stats(_timeit(env._get_observation, steps))
+    return result
+
+
+def bench_vector(num_envs, market_size, steps, seed):
+    """Benchmark do VectorHomeChoiceEnv com `num_envs` mercados de `market_size` imóveis."""
+    env = VectorHomeChoiceEnv(num_envs, market_size=market_size, seed=seed)
+    result = {"kind": "vector", "num_envs": num_envs, "market_size": market_size}
+    result["reset"] = _stats(_timeit(lambda: env.reset(seed=seed), 3))
+    actions = np.random.default_rng(seed).integers(0, 3, size=(steps, num_envs))
+    samples = []
+    for row in actions:
+        start = time.perf_counter()
+        env.step(row)
+        samples.append(time.perf_counter() - start)
+    result["step"] = _stats(samples)
+    result["env_steps_per_sec"] = result["step"]["per_sec"] * num_envs
+    return result
+
+
+def bench_render(market_size, frames, seed):
+    """Custo de renderização headless (pygame em modo "rgb_array", backend Agg para matplotlib)."""
+    result = {"kind": "render", "market_size": market_size}
+    try:
+        env = HomeChoiceEnv(render_mode="rgb_array", market_size=market_size)
+        env.reset(seed=seed)
+        result["pygame"] = _stats(_timeit(lambda: (env.step(1), env.render()), frames))
+        env.close()
+    except Exception as exc:  # pygame ausente ou sem driver de vídeo
+        result["pygame"] = {"error": repr(exc)}
+    env = HomeChoiceEnv(render_mode="human", market_size=market_size)
+    env.reset(seed=seed)
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        with contextlib.redirect_stdout(io.StringIO()):
+            result["matplotlib"] = _stats(_timeit(lambda: (env.step(1), env.render_grafs()), frames))
+    except Exception as exc:
+        result["matplotlib"] = {"error": repr(exc)}
+    finally:
+        env.close()  # Apaga o gravador temporário dos gráficos
+    return result
+
+###################################################################################################################
+def _metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(args):
+    results = []
+    for size in args.sizes:
+        print(f"[env] market_size={size}", file=sys.stderr)
+        results.append(bench_env(size, args.steps, args.resets, args.observation, args.seed))
+        for num_envs in args.num_envs:
+            if num_envs * size > args.max_cells:
+                print(f"[vector] pulando num_envs={num_envs} market_size={size} (> --max-cells)", file=sys.stderr)
+                continue
+            print(f"[vector] num_envs={num_envs} market_size={size}", file=sys.stderr)
+            results.append(bench_vector(num_envs, size, args.steps, args.seed))
+    if args.render:
+        print("[render]", file=sys.stderr)
+        results.append(bench_render(min(args.sizes), args.frames, args.seed))
+    return {"meta": _metadata(), "config": vars(args), "results": results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de throughput do HomeChoiceEnv")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 1000000], help="tamanhos de mercado")
+    parser.add_argument("--num-envs", type=int, nargs="+", default=[1, 8, 32], help="números de ambientes do VectorHomeChoiceEnv")
+    parser.add_argument("--steps", type=int, default=2000, help="passos medidos por configuração")
+    parser.add_argument("--resets", type=int, default=5, help="resets medidos por tamanho de mercado")
+    parser.add_argument("--observation", default="basic", help="preset de observação (basic, rich)")
+    parser.add_argument("--render", action="store_true", help="inclui o custo de renderização headless")
+    parser.add_argument("--frames", type=int, default=50, help="quadros medidos na renderização")
+    parser.add_argument("--max-cells", type=int, default=20000000, help="limite de num_envs * market_size no vetorizado")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json", help="arquivo JSON de saída")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Resultados salvos em '{args.output}'", file=sys.stderr)
+    return report
+
+
+if __name__ == "__main__":
+    main()